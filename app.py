@@ -1,84 +1,224 @@
 
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import plotly.express as px
 
+from raw_explorer import PAGE_SIZES, SORT_COLUMNS, order_length, page_rows, row_order
+from render_profile import RenderProfile, new_history, show_panel
+from result_cache import ResultCache, filter_key
+from sales_data import csv_fingerprint, freeze_frame, load_sales
+from sales_cube import SalesCube, summarize
+from sales_index import FILTER_DIMS, FilterIndex
+from sales_store import STORE_DIR, SalesStore
+
+SALES_CSV = "stallion_sales_data.csv"
+FORECAST_FILES = [
+    ("stallion_prophet_forecast.csv", "Prophet"),
+    ("stallion_arima_forecast.csv", "ARIMA"),
+    ("stallion_numpy_forecast.csv", "Holt-Winters"),
+]
+# "pandas" (default) or "sql": answer dashboard queries from an embedded DuckDB/SQLite copy
+BACKEND = os.environ.get("SALES_BACKEND", "pandas")
+
 st.set_page_config(layout="wide", page_title="Stallion Motors — Sales Dashboard")
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("stallion_sales_data.csv", parse_dates=["Date"])
+# Opt-in render profiling: DASHBOARD_PROFILE=1 or ?profile=1 in the URL
+profile = RenderProfile(os.environ.get("DASHBOARD_PROFILE") == "1" or st.query_params.get("profile") == "1")
+
+# cache_resource (not cache_data) so every session and rerun reads the same read-only
+# frame instead of unpickling a private copy; keyed on the CSV version so edits reload.
+# The frame is held Date-sorted inside a FilterIndex built once per data version.
+@st.cache_resource(max_entries=1)
+def load_data(data_version):
+    df = load_sales(SALES_CSV, shared=True)
     df["Year"] = df["Date"].dt.year
     df["Month"] = df["Date"].dt.month
-    return df
+    return FilterIndex(df)
+
+# With a sales store (see ingest.py) only the month partitions overlapping the selected
+# dates are loaded; a few recent windows stay cached, keyed on their partitions' version.
+@st.cache_resource(max_entries=4)
+def load_window(data_version, first_month, last_month):
+    df = freeze_frame(SalesStore(STORE_DIR).read(first_month, last_month))
+    df["Year"] = df["Date"].dt.year
+    df["Month"] = df["Date"].dt.month
+    return FilterIndex(df)
+
+@st.cache_resource(max_entries=4)
+def load_cube(data_version, window=None):
+    # month x region x salesperson x model sums, built once per data version (and window)
+    index = load_data(data_version) if window is None else load_window(data_version, *window)
+    return SalesCube(index.frame)
 
-df = load_data()
+# Filtered KPIs and chart frames per selection, shared by every session (see result_cache.py)
+@st.cache_resource
+def result_cache():
+    return ResultCache()
+
+# Row orders of the raw-data explorer's searches and sorts, so paging does not re-sort
+@st.cache_resource
+def order_cache():
+    return ResultCache(max_entries=8, max_bytes=256 * 2**20)
+
+@st.cache_resource(max_entries=1)
+def load_db(data_version):
+    from sql_backend import SalesDB
+    db = SalesDB()
+    db.load_csv(SALES_CSV, data_version)
+    return db
+
+with profile.section("load"):
+    store = SalesStore(STORE_DIR) if (STORE_DIR / "_manifest.json").exists() else None
+    if BACKEND == "sql":
+        # Nothing is loaded into pandas; bounds, options and summaries are SQL queries
+        data_version = csv_fingerprint(SALES_CSV)
+        db = load_db(data_version)
+        min_date, max_date = db.date_bounds()
+        options = db.values(FILTER_DIMS)
+    elif store is None:
+        data_version = csv_fingerprint(SALES_CSV)
+        index = load_data(data_version)
+        min_date, max_date = index.min_date, index.max_date
+        options = {dim: index.values(dim) for dim in FILTER_DIMS}
+    else:
+        # Bounds and filter options come from the store manifest; no partition is opened yet
+        min_date, max_date = store.date_bounds()
+        options = store.values(FILTER_DIMS)
 
 st.title("Stallion Motors — Sales Performance Dashboard")
 
 # Sidebar filters
 with st.sidebar:
     st.header("Filters")
-    min_date = df["Date"].min()
-    max_date = df["Date"].max()
     date_range = st.date_input("Date range", [min_date, max_date])
-    regions = ["All"] + sorted(df["Region"].unique().tolist())
+    regions = ["All"] + options["Region"]
     region = st.selectbox("Region", regions)
-    salesperson_options = ["All"] + sorted(df["Salesperson"].unique().tolist())
+    salesperson_options = ["All"] + options["Salesperson"]
     salesperson = st.selectbox("Salesperson", salesperson_options)
-    model_options = ["All"] + sorted(df["Vehicle_Model"].unique().tolist())
+    model_options = ["All"] + options["Vehicle_Model"]
     model = st.selectbox("Vehicle Model", model_options)
-    include_forecast = st.checkbox("Show 6-month forecast (Prophet)", value=True)
+    include_forecast = st.checkbox("Show 6-month forecast", value=True)
 
-# Apply filters
-df_filtered = df.copy()
 start, end = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-df_filtered = df_filtered[(df_filtered["Date"] >= start) & (df_filtered["Date"] <= end)]
-if region != "All":
-    df_filtered = df_filtered[df_filtered["Region"] == region]
-if salesperson != "All":
-    df_filtered = df_filtered[df_filtered["Salesperson"] == salesperson]
-if model != "All":
-    df_filtered = df_filtered[df_filtered["Vehicle_Model"] == model]
+filters = {
+    "Region": None if region == "All" else region,
+    "Salesperson": None if salesperson == "All" else salesperson,
+    "Vehicle_Model": None if model == "All" else model,
+}
+if BACKEND != "sql":
+    if store is not None:
+        # Date filter pushed down to the store: read only the overlapping partitions
+        with profile.section("load"):
+            window = (start.strftime("%Y-%m"), end.strftime("%Y-%m"))
+            data_version = store.version(start, end)
+            index = load_window(data_version, *window)
 
-# KPIs
-col1, col2, col3, col4 = st.columns(4)
-total_revenue = (df_filtered["Price"] * df_filtered["Quantity"]).sum()
-total_units = df_filtered["Quantity"].sum()
-avg_price = (df_filtered["Price"] * df_filtered["Quantity"]).sum() / max(1, total_units)
-total_profit = df_filtered["Profit"].sum()
+    # Apply filters through the index: binary-search the date slice, then intersect the
+    # per-value row positions (the shared frame is never copied)
+    with profile.section("filter"):
+        positions = index.row_positions(start, end, filters)
 
-col1.metric("Total Revenue", f"${total_revenue:,.0f}")
-col2.metric("Units Sold", f"{int(total_units):,}")
-col3.metric("Avg Selling Price", f"${avg_price:,.0f}")
-col4.metric("Total Profit", f"${total_profit:,.0f}")
+# A repeat selection is answered from the LRU without touching raw rows
+results = result_cache()
+result_key = filter_key((BACKEND, data_version), start, end, filters, (min_date, max_date))
+with profile.section("cache"):
+    cached = results.get(result_key)
+if cached is not None:
+    summary = cached["summary"]
+elif BACKEND == "sql":
+    with profile.section("summarize"):
+        summary = db.summarize(start, end, filters)
+else:
+    with profile.section("load"):
+        cube = load_cube(data_version) if store is None else load_cube(data_version, window)
+
+    # Aggregates come from the cube when the date range covers whole months, else from raw rows
+    with profile.section("summarize"):
+        cube_rows = cube.select(start, end, filters)
+        summary = summarize(cube_rows if cube_rows is not None else index.frame.iloc[positions])
+if cached is None:
+    results.put(result_key, {"summary": summary})
+
+# KPIs
+with profile.section("kpis"):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Revenue", f"${summary['total_revenue']:,.0f}")
+    col2.metric("Units Sold", f"{int(summary['total_units']):,}")
+    col3.metric("Avg Selling Price", f"${summary['avg_price']:,.0f}")
+    col4.metric("Total Profit", f"${summary['total_profit']:,.0f}")
 
 # Time series
-monthly = df_filtered.groupby(pd.Grouper(key="Date", freq="M")).agg(Revenue=("Price","sum"), Units=("Quantity","sum")).reset_index()
-fig1 = px.line(monthly, x="Date", y="Revenue", title="Monthly Revenue")
-st.plotly_chart(fig1, use_container_width=True)
+with profile.section("revenue_chart.build"):
+    fig1 = px.line(summary["monthly"], x="Date", y="Revenue", title="Monthly Revenue")
+with profile.section("revenue_chart.send"):
+    st.plotly_chart(fig1, use_container_width=True)
 
 # Top models
-top_models = df_filtered.groupby("Vehicle_Model").agg(Revenue=("Price","sum"), Units=("Quantity","sum")).reset_index().sort_values("Revenue", ascending=False).head(10)
-fig2 = px.bar(top_models, x="Vehicle_Model", y="Revenue", title="Top 10 Models by Revenue")
-st.plotly_chart(fig2, use_container_width=True)
+with profile.section("models_chart.build"):
+    fig2 = px.bar(summary["top_models"], x="Vehicle_Model", y="Revenue", title="Top 10 Models by Revenue")
+with profile.section("models_chart.send"):
+    st.plotly_chart(fig2, use_container_width=True)
 
 # Sales by region
-sales_region = df_filtered.groupby("Region").agg(Revenue=("Price","sum")).reset_index()
-fig3 = px.pie(sales_region, values="Revenue", names="Region", title="Revenue Share by Region")
-st.plotly_chart(fig3, use_container_width=True)
+with profile.section("region_chart.build"):
+    fig3 = px.pie(summary["sales_region"], values="Revenue", names="Region", title="Revenue Share by Region")
+with profile.section("region_chart.send"):
+    st.plotly_chart(fig3, use_container_width=True)
 
-# Show raw data
-with st.expander("Show raw sales data (first 200 rows)"):
-    st.dataframe(df_filtered.head(200))
+# Raw rows, one page at a time: search and sort run on row positions (or in SQL), and
+# only the visible page is built and sent to the browser
+with profile.section("raw_table"):
+    with st.expander("Show raw sales data"):
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+        search = col1.text_input("Search", placeholder="Sale ID, model, region, branch, salesperson...").strip()
+        sort = col2.selectbox("Sort by", SORT_COLUMNS)
+        descending = col3.checkbox("Descending")
+        page_size = col4.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(200))
+        sort_by = None if sort == "Date" and not descending else sort   # rows are stored Date-sorted
+        if BACKEND == "sql":
+            total = db.count(start, end, filters, search)
+        else:
+            orders = order_cache()
+            order_key = (result_key, search, sort_by, descending)
+            order = orders.get(order_key)
+            if order is None:
+                order = row_order(index.frame, positions, search, sort_by, descending)
+                if search or sort_by is not None:
+                    orders.put(order_key, order)
+            total = order_length(order)
+        pages = max(1, -(-total // page_size))
+        # Keyed on the view, so a new filter, search or sort starts again at page 1
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1,
+                               key=f"raw_page:{hash((result_key, search, sort_by, descending, page_size))}")
+        if BACKEND == "sql":
+            rows = db.rows(start, end, filters, limit=page_size, search=search, sort=sort_by,
+                           descending=descending, offset=(page - 1) * page_size)
+        else:
+            rows = page_rows(index.frame, order, page - 1, page_size)
+        first = (page - 1) * page_size
+        st.caption(f"Rows {min(first + 1, total):,}–{first + len(rows):,} of {total:,}")
+        st.dataframe(rows)
 
 # Forecast (if available)
 if include_forecast:
+    # run_pipeline.py writes one of these per run; show the most recent
+    forecast_files = [(f, label) for f, label in FORECAST_FILES if os.path.exists(f)]
     try:
-        prophet_forecast = pd.read_csv("stallion_prophet_forecast.csv", parse_dates=["ds"])
-        figf = px.line(prophet_forecast, x="ds", y="yhat", title="Prophet 6-Month Forecast (Revenue)")
-        st.plotly_chart(figf, use_container_width=True)
+        with profile.section("forecast.read"):
+            path, label = max(forecast_files, key=lambda item: os.path.getmtime(item[0]))
+            forecast = pd.read_csv(path, parse_dates=["ds"])
+        with profile.section("forecast_chart.build"):
+            figf = px.line(forecast, x="ds", y="yhat", title=f"{label} 6-Month Forecast (Revenue)")
+        with profile.section("forecast_chart.send"):
+            st.plotly_chart(figf, use_container_width=True)
     except Exception as e:
-        st.warning("Prophet forecast not available. Run sales_forecast.ipynb to generate forecasts. Error: " + str(e))
+        st.warning("Forecast not available. Run run_pipeline.py (or sales_forecast.ipynb) to generate forecasts. Error: " + str(e))
+
+if profile.enabled:
+    # Last, so every section of this rerun is in the breakdown
+    show_panel(profile, st.session_state.setdefault("render_profile", new_history()),
+               {"Result cache": results.stats(), "Explorer order cache": order_cache().stats()})
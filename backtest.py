@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""backtest.py
+
+Rolling-origin backtests of the revenue forecasters (Prophet, ARIMA, NumPy Holt-Winters).
+- For every series, model and origin, the model is fitted on the months before the origin
+  and scored on the next `horizon` months.
+- (series, model, origin) tasks run across a process pool. Each fitted model is pickled to
+  .cache/backtest/ under a hash of the model name and its training window, so a rerun (or
+  a longer series with the same history) reuses fits instead of refitting.
+- Fit and predict wall time are measured separately; a cache hit reports the fit time
+  recorded when the model was first fitted.
+- The module exposes:
+    * MODELS                                            -> {name: (fit(train), predict(model, train, periods))}
+    * rolling_origins(n, horizon, min_train, step)      -> list of training lengths
+    * backtest(series, models, horizon, ...)            -> long table, one row per forecast month
+    * score_backtest(results)                           -> MAPE / sMAPE / latency per series and model
+    * best_models(scores, metric='smape')               -> best model per series
+
+Usage:
+    python backtest.py --sales_csv stallion_sales_data.csv --segments --workers 4
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecasting import (SEGMENT_DIMS, _arima_fit, _numpy_fit, _numpy_predict, _prophet_fit, _time_limit,
+                         segment_series)
+
+PROJ = Path(__file__).resolve().parent
+CACHE_DIR = PROJ / '.cache' / 'backtest'
+RESULT_COLUMNS = ['segment_type', 'segment', 'model', 'origin', 'step', 'ds', 'y', 'yhat',
+                  'fit_seconds', 'predict_seconds', 'cached']
+
+
+def _future_index(series, periods):
+    return pd.date_range(series.index.max() + pd.offsets.MonthBegin(1), periods=periods, freq='M')
+
+
+def _predict_prophet(model, series, periods):
+    return model.predict(pd.DataFrame({'ds': _future_index(series, periods)}))['yhat'].to_numpy()
+
+
+def _predict_arima(model, series, periods):
+    return np.asarray(model.predict(n_periods=periods))
+
+
+def _fit_numpy(series):
+    return _numpy_fit(series.to_numpy()[None, :])
+
+def _predict_numpy(model, series, periods):
+    return _numpy_predict(model, periods)[0]
+
+
+MODELS = {
+    'prophet': (_prophet_fit, _predict_prophet),
+    'arima': (_arima_fit, _predict_arima),
+    'numpy': (_fit_numpy, _predict_numpy),
+}
+
+
+def rolling_origins(n, horizon=6, min_train=24, step=1):
+    """Training lengths of every origin that leaves a full horizon of actuals to score."""
+    return list(range(min_train, n - horizon + 1, step))
+
+
+def _cache_path(cache_dir, name, train):
+    h = hashlib.sha256(name.encode())
+    h.update(train.index.asi8.tobytes())
+    h.update(train.to_numpy(dtype=float).tobytes())
+    return Path(cache_dir) / f'{name}-{h.hexdigest()[:16]}.pkl'
+
+
+def _fitted_model(name, train, cache_dir, timeout):
+    """(model, fit_seconds, cached) for one training window, from the cache when possible."""
+    path = _cache_path(cache_dir, name, train) if cache_dir else None
+    if path is not None and path.exists():
+        try:
+            with open(path, 'rb') as fh:
+                entry = pickle.load(fh)
+            return entry['model'], entry['fit_seconds'], True
+        except Exception:
+            pass   # unreadable entry: refit and overwrite
+    fit = MODELS[name][0]
+    t0 = time.perf_counter()
+    with _time_limit(timeout):
+        model = fit(train)
+    fit_seconds = time.perf_counter() - t0
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'wb') as fh:
+                pickle.dump({'model': model, 'fit_seconds': fit_seconds}, fh)
+            os.replace(tmp, path)
+        except Exception:
+            tmp.unlink(missing_ok=True)   # model not picklable; just skip caching it
+    return model, fit_seconds, False
+
+
+def _run_task(series, name, n_train, horizon, cache_dir, timeout):
+    """Fit on the first n_train months and forecast the next `horizon`.
+    Returns (rows dict or None, error message or None)."""
+    train, test = series.iloc[:n_train], series.iloc[n_train:n_train + horizon]
+    try:
+        model, fit_seconds, cached = _fitted_model(name, train, cache_dir, timeout)
+        t0 = time.perf_counter()
+        with _time_limit(timeout):
+            yhat = MODELS[name][1](model, train, len(test))
+        predict_seconds = time.perf_counter() - t0
+    except Exception as e:   # includes a missing package and timeouts
+        return None, f'{name}: {e}'
+    return {'origin': train.index[-1], 'step': np.arange(1, len(test) + 1), 'ds': test.index,
+            'y': test.to_numpy(dtype=float), 'yhat': np.asarray(yhat, dtype=float),
+            'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds, 'cached': cached}, None
+
+
+def backtest(series, models=tuple(MODELS), horizon=6, min_train=24, step=1, workers=None,
+             timeout=120, cache_dir=CACHE_DIR):
+    """Rolling-origin backtest of every model on every series.
+    - series: {(segment_type, segment): monthly pd.Series}, e.g. from segment_series
+    - workers: process pool size (None -> os.cpu_count(); 1 -> in-process)
+    - timeout: seconds allowed per fit or predict
+    - cache_dir: where fitted models are cached (None disables the cache)
+    Returns a long table with RESULT_COLUMNS. Failed fits (e.g. a model that is not
+    installed) are left out and summarized per model.
+    """
+    tasks = [(key, name, n) for key, s in series.items() for name in models
+             for n in rolling_origins(len(s), horizon, min_train, step)]
+    args = ([series[k] for k, _, _ in tasks], [name for _, name, _ in tasks], [n for _, _, n in tasks],
+            [horizon] * len(tasks), [cache_dir] * len(tasks), [timeout] * len(tasks))
+    if workers == 1 or not tasks:
+        results = list(map(_run_task, *args))
+    else:
+        # Chunks amortize the per-task IPC; NumPy fits take well under a millisecond
+        chunksize = max(1, len(tasks) // (8 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, *args, chunksize=chunksize))
+
+    frames, failed = [], {}
+    for (key, name, _), (rows, error) in zip(tasks, results):
+        if rows is None:
+            failed.setdefault(name, {}).setdefault(key, error)
+            continue
+        frames.append(pd.DataFrame(rows).assign(segment_type=key[0], segment=key[1], model=name))
+    for name, errors in failed.items():
+        print(f'Backtest of {name} failed on {len(errors)} series, e.g.:', next(iter(errors.values())))
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[RESULT_COLUMNS]
+
+
+def score_backtest(results):
+    """MAPE and sMAPE (in %) plus mean fit/predict seconds per (series, model).
+    MAPE skips months with zero actual revenue; sMAPE counts 0 vs 0 as a perfect forecast."""
+    err = (results['y'] - results['yhat']).abs()
+    denom = results['y'].abs() + results['yhat'].abs()
+    scored = results.assign(
+        ape=(err / results['y'].abs()).where(results['y'] != 0),
+        sape=(2 * err / denom).where(denom != 0, 0.0),
+    )
+    # Latency is per fit, not per forecast month
+    fits = scored.drop_duplicates(['segment_type', 'segment', 'model', 'origin'])
+    keys = ['segment_type', 'segment', 'model']
+    scores = scored.groupby(keys, sort=False).agg(mape=('ape', 'mean'), smape=('sape', 'mean'))
+    scores[['mape', 'smape']] *= 100
+    latency = fits.groupby(keys, sort=False).agg(
+        origins=('origin', 'size'), fit_seconds=('fit_seconds', 'mean'),
+        predict_seconds=('predict_seconds', 'mean'), cached=('cached', 'mean'))
+    return scores.join(latency).reset_index()
+
+
+def best_models(scores, metric='smape'):
+    """Model with the lowest `metric` per series (ties go to the faster fit)."""
+    ranked = scores.sort_values([metric, 'fit_seconds'])
+    best = ranked.drop_duplicates(['segment_type', 'segment'])
+    return best.set_index(['segment_type', 'segment'])['model']
+
+
+def revenue_series(df, segments=False):
+    """Total monthly revenue as ('Total', 'Revenue'), plus every segment series if requested."""
+    out = segment_series(df.assign(Total='Revenue'), ('Total',))
+    if segments:
+        out.update(segment_series(df, SEGMENT_DIMS))
+    return out
+
+
+def main(sales_csv, models=tuple(MODELS), horizon=6, min_train=24, step=1, segments=False,
+         workers=None, timeout=120, use_cache=True):
+    from sales_schema import read_sales_csv
+    df = read_sales_csv(sales_csv)
+    results = backtest(revenue_series(df, segments), models, horizon=horizon, min_train=min_train,
+                       step=step, workers=workers, timeout=timeout,
+                       cache_dir=CACHE_DIR if use_cache else None)
+    if results.empty:
+        print('No model could be backtested')
+        return None
+    scores = score_backtest(results)
+    scores['best'] = scores['model'].eq(
+        scores.set_index(['segment_type', 'segment']).index.map(best_models(scores)))
+    scores.to_csv(PROJ / 'stallion_backtest.csv', index=False)
+    print(f'Saved stallion_backtest.csv ({len(results)} forecast months, '
+          f'{results["cached"].mean():.0%} of fits from cache)')
+    summary = scores.groupby('model').agg(series=('segment', 'size'), best=('best', 'sum'),
+                                          mape=('mape', 'median'), smape=('smape', 'median'),
+                                          fit_seconds=('fit_seconds', 'mean'))
+    print(summary.round(3).to_string())
+    return scores
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sales_csv', default=str(PROJ / 'stallion_sales_data.csv'))
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--horizon', type=int, default=6, help='months forecast from each origin')
+    parser.add_argument('--min_train', type=int, default=24, help='months of history at the first origin')
+    parser.add_argument('--step', type=int, default=1, help='months between origins')
+    parser.add_argument('--segments', action='store_true',
+                        help='also backtest every Region, Dealer_Branch and Vehicle_Model series')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='process pool size (default: all cores; 1 runs in-process)')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed per fit or predict')
+    parser.add_argument('--no_cache', action='store_true', help='refit every model instead of using .cache/backtest')
+    args = parser.parse_args()
+    main(args.sales_csv, tuple(args.models), horizon=args.horizon, min_train=args.min_train,
+         step=args.step, segments=args.segments, workers=args.workers, timeout=args.timeout,
+         use_cache=not args.no_cache)
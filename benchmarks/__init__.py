@@ -0,0 +1,8 @@
+"""benchmarks
+
+Scalability benchmarks for the dashboard and the monthly pipeline.
+- datagen: seeded synthetic transactions with the distributions of stallion_sales_data.csv
+- bench: timed load / filter / KPI / leaderboard / forecast benchmarks, results as JSON
+
+Run from the project root, e.g. `python -m benchmarks.bench --sizes 1e5 1e6`.
+"""
@@ -0,0 +1,230 @@
+"""benchmarks/bench.py
+
+Timed benchmarks of the dashboard and pipeline code paths on generated data.
+- For each size, a seeded dataset is generated once (benchmarks/datagen.py) and cached
+  under .cache/benchmarks/.
+- Each benchmark runs `repeat` times and records every wall time. Benchmarks:
+    load         read_sales_csv of the generated CSV
+    index        FilterIndex build (app.py load_data)
+    filter       FILTER_CASES through FilterIndex.select (app.py filter chain)
+    cube         SalesCube build (app.py load_cube)
+    kpi          cube (or raw-row) summarize for every filter case (app.py KPIs and charts)
+    monthly_agg  run_pipeline.monthly_aggregates
+    leaderboard  compute_leaderboard without its sale-level cache
+    forecast     forecast of monthly revenue, one benchmark per installed model
+    stream       run_pipeline.stream_sales (--chunksize mode)
+- peak_rss_mb is the process high-water mark after the benchmark, so it never decreases
+  within a run; run one size per process to compare memory between sizes.
+- Results are written as JSON (environment + one record per benchmark and size);
+  --compare flags benchmarks that got slower than a previous results file.
+- The module exposes:
+    * run_benchmarks(sizes, seed, repeat, names)   -> list of result records
+    * compare(baseline, current, threshold)        -> DataFrame of min-time ratios
+    * environment()                                -> versions, commit and machine info
+
+Usage:
+    python -m benchmarks.bench --sizes 1e5 1e6 --out results.json
+    python -m benchmarks.bench --sizes 1e5 --compare results.json
+"""
+import argparse
+from datetime import datetime, timezone
+import importlib.util
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datagen import write_sales_csv
+
+PROJ = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJ / '.cache' / 'benchmarks'
+BENCHMARKS = ('load', 'index', 'filter', 'cube', 'kpi', 'monthly_agg', 'leaderboard', 'forecast', 'stream')
+STREAM_CHUNKSIZE = 500_000
+
+# (start, end, filters) as sent by the dashboard sidebar: the full range, whole months
+# (cube-aligned) and a range that splits months (raw rows)
+FILTER_CASES = [
+    (None, None, {}),
+    (None, None, {'Region': 'Lagos'}),
+    (None, None, {'Region': 'Lagos', 'Salesperson': 'John Smith'}),
+    (None, None, {'Region': 'Lagos', 'Salesperson': 'John Smith', 'Vehicle_Model': 'Toyota Corolla'}),
+    ('2024-01-01', '2024-06-30', {'Salesperson': 'Aisha Bello'}),
+    ('2024-03-15', '2024-09-10', {'Vehicle_Model': 'Toyota RAV4'}),
+]
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJ, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def dataset(n_rows, seed=0, data_dir=DATA_DIR):
+    path = Path(data_dir) / f'sales_{n_rows}_seed{seed}.csv'
+    if not path.exists():
+        t0 = time.perf_counter()
+        write_sales_csv(path, n_rows, seed)
+        print(f'Generated {path.name} in {time.perf_counter() - t0:.1f}s')
+    return path
+
+
+def _time(name, rows, func, repeat):
+    seconds = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = func()
+        seconds.append(time.perf_counter() - t0)
+    best = min(seconds)
+    print(f'{name:<18}{rows:>13,} rows {best:10.4f}s')
+    return {'benchmark': name, 'rows': rows, 'repeat': repeat, 'seconds': seconds, 'min': best,
+            'median': statistics.median(seconds), 'rows_per_second': rows / best if best else None,
+            'peak_rss_mb': _peak_rss_mb()}, value
+
+
+def _filter_cases(index):
+    return [(pd.Timestamp(start) if start else index.min_date, pd.Timestamp(end) if end else index.max_date,
+             filters) for start, end, filters in FILTER_CASES]
+
+
+def _kpis(cube, index, cases):
+    from sales_cube import summarize
+    out = []
+    for start, end, filters in cases:
+        rows = cube.select(start, end, filters)
+        out.append(summarize(rows if rows is not None else index.select(start, end, filters)))
+    return out
+
+
+def _forecasters():
+    from forecasting import arima_forecast, numpy_forecast, prophet_forecast
+    models = {'numpy': numpy_forecast}
+    if importlib.util.find_spec('prophet') is not None:
+        models['prophet'] = prophet_forecast
+    if importlib.util.find_spec('pmdarima') is not None:
+        models['arima'] = arima_forecast
+    return models
+
+
+def run_size(csv, rows, repeat=3, names=BENCHMARKS):
+    """Benchmarks for one dataset. Stages other benchmarks need are built untimed when
+    they are not selected themselves."""
+    from commission_calc import compute_leaderboard
+    from run_pipeline import monthly_aggregates, stream_sales
+    from sales_cube import SalesCube
+    from sales_index import FilterIndex
+    from sales_schema import read_sales_csv
+
+    records = []
+
+    def step(name, func, wanted=True):
+        if name in names and wanted:
+            record, value = _time(name, rows, func, repeat)
+            records.append(record)
+            return value
+        return func()
+
+    df = step('load', lambda: read_sales_csv(csv))
+    needs_index = {'index', 'filter', 'cube', 'kpi'} & set(names)
+    if needs_index:
+        index = step('index', lambda: FilterIndex(df))
+        cases = _filter_cases(index)
+        if 'filter' in names:
+            step('filter', lambda: [index.select(*case) for case in cases])
+        if {'cube', 'kpi'} & set(names):
+            cube = step('cube', lambda: SalesCube(index.frame))
+            if 'kpi' in names:
+                step('kpi', lambda: _kpis(cube, index, cases))
+    if {'monthly_agg', 'forecast'} & set(names):
+        monthly = step('monthly_agg', lambda: monthly_aggregates(df))
+        if 'forecast' in names:
+            series = monthly.set_index('ds')['Revenue']
+            for model, forecast in _forecasters().items():
+                record, _ = _time(f'forecast_{model}', rows, lambda: forecast(series, 6), repeat)
+                records.append(record)
+    if 'leaderboard' in names:
+        step('leaderboard', lambda: compute_leaderboard(df, use_cache=False))
+    if 'stream' in names:
+        del df   # measure the streaming path without the whole frame resident
+        step('stream', lambda: stream_sales(csv, STREAM_CHUNKSIZE))
+    return records
+
+
+def run_benchmarks(sizes, seed=0, repeat=3, names=BENCHMARKS, data_dir=DATA_DIR):
+    records = []
+    for n_rows in sizes:
+        records.extend(run_size(dataset(n_rows, seed, data_dir), n_rows, repeat, names))
+    return records
+
+
+def compare(baseline, current, threshold=1.25):
+    """Ratio of current to baseline best time per (benchmark, rows) present in both;
+    `regressed` marks ratios above threshold."""
+    key = ['benchmark', 'rows']
+    old = pd.DataFrame(baseline['results'])[key + ['min']]
+    new = pd.DataFrame(current['results'])[key + ['min']]
+    table = old.merge(new, on=key, suffixes=('_baseline', '_current'))
+    table['ratio'] = table['min_current'] / table['min_baseline']
+    table['regressed'] = table['ratio'] > threshold
+    return table
+
+
+def main(sizes, seed=0, repeat=3, names=BENCHMARKS, out=None, baseline=None, threshold=1.25):
+    report = {'environment': environment(), 'seed': seed,
+              'results': run_benchmarks(sizes, seed, repeat, names)}
+    out = Path(out) if out else DATA_DIR / f'results-{report["environment"]["timestamp"].replace(":", "")}.json'
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print('Saved', out)
+    if baseline is None:
+        return report, None
+    table = compare(json.loads(Path(baseline).read_text()), report, threshold)
+    print(table.round(4).to_string(index=False))
+    return report, table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e5, 1e6], help='rows per dataset, e.g. 1e5 1e7')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help='benchmarks to time (default: all)')
+    parser.add_argument('--out', default=None, help='results JSON (default: .cache/benchmarks/results-<time>.json)')
+    parser.add_argument('--compare', default=None, help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio reported as a regression by --compare')
+    args = parser.parse_args()
+    _, table = main([int(n) for n in args.sizes], args.seed, args.repeat, tuple(args.only), args.out,
+                    args.compare, args.threshold)
+    if table is not None and table['regressed'].any():
+        sys.exit(1)
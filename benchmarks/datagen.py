@@ -0,0 +1,91 @@
+"""benchmarks/datagen.py
+
+Seeded synthetic Stallion Motors transactions at any scale (10^5 to 10^8 rows).
+- Distributions are taken from the shipped stallion_sales_data.csv: each generated row
+  resamples the dimension columns, customer fields and Cost/Price margin of a reference
+  row, so the joint mix (model -> type, branch -> region, salesperson x branch, payment x
+  customer type) is preserved.
+- The month is drawn with the reference monthly volumes as weights (keeping its trend and
+  seasonality), the day uniformly within that month. Price gets a small log-normal jitter;
+  Cost keeps the resampled margin and Profit = Price - Cost.
+- Sale_IDs are unique (S-YYYYMMDD-<row number>).
+- Rows are generated in fixed blocks, each with its own generator seeded from (seed, block
+  number): the same seed and size always give the same rows, and the full blocks of a
+  smaller file are a prefix of a larger one. Writing never holds more than one block in memory.
+- The module exposes:
+    * sales_profile(reference)              -> resampling tables from a reference CSV
+    * generate_sales(n_rows, seed, ...)     -> iterator of DataFrame blocks (schema dtypes)
+    * write_sales_csv(path, n_rows, seed)   -> path of a CSV in the stallion_sales_data.csv layout
+
+Usage:
+    python -m benchmarks.datagen --rows 1e7 --out .cache/benchmarks/sales_10000000.csv
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sales_schema import apply_schema, read_sales_csv
+
+PROJ = Path(__file__).resolve().parent.parent
+REFERENCE_CSV = PROJ / 'stallion_sales_data.csv'
+BLOCK_ROWS = 1_000_000
+PRICE_JITTER = 0.02     # sigma of the log-normal price noise
+
+
+def sales_profile(reference=REFERENCE_CSV):
+    df = read_sales_csv(reference)
+    counts = df['Date'].dt.to_period('M').value_counts().sort_index()
+    return {
+        'columns': list(df.columns),
+        'rows': df.drop(columns=['Sale_ID', 'Date']).reset_index(drop=True),
+        'margin': (df['Cost'] / df['Price']).to_numpy(),
+        'month_start': counts.index.start_time.to_numpy(),
+        'month_days': counts.index.days_in_month.to_numpy(),
+        'month_weights': counts.to_numpy() / counts.sum(),
+    }
+
+
+def _block(profile, n, rng, first_id):
+    pick = rng.integers(0, len(profile['rows']), n)
+    out = profile['rows'].take(pick).reset_index(drop=True)
+    month = rng.choice(len(profile['month_weights']), n, p=profile['month_weights'])
+    days = (rng.random(n) * profile['month_days'][month]).astype('int64')
+    out['Date'] = profile['month_start'][month] + days.astype('timedelta64[D]')
+
+    price = np.rint(out['Price'].to_numpy() * np.exp(rng.normal(0, PRICE_JITTER, n))).astype('int64')
+    cost = np.rint(price * profile['margin'][pick]).astype('int64')
+    out['Price'], out['Cost'], out['Profit'] = price, cost, price - cost
+
+    ids = pd.Series(np.arange(first_id, first_id + n)).astype(str).str.zfill(4)
+    out['Sale_ID'] = 'S-' + out['Date'].dt.strftime('%Y%m%d') + '-' + ids
+    return apply_schema(out[profile['columns']])
+
+
+def generate_sales(n_rows, seed=0, reference=REFERENCE_CSV, profile=None):
+    """Yield n_rows synthetic transactions in blocks of at most BLOCK_ROWS rows."""
+    profile = profile or sales_profile(reference)
+    for number, first in enumerate(range(0, n_rows, BLOCK_ROWS)):
+        rng = np.random.default_rng([seed, number])
+        yield _block(profile, min(BLOCK_ROWS, n_rows - first), rng, first)
+
+
+def write_sales_csv(path, n_rows, seed=0, reference=REFERENCE_CSV):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    for i, block in enumerate(generate_sales(n_rows, seed, reference)):
+        block.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False, date_format='%Y-%m-%d')
+    tmp.replace(path)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=float, required=True, help='rows to generate, e.g. 1e6')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--reference', default=str(REFERENCE_CSV), help='CSV whose distributions are copied')
+    args = parser.parse_args()
+    print('Saved', write_sales_csv(args.out, int(args.rows), args.seed, args.reference))
@@ -12,11 +12,21 @@ Tuned commission rules for Stallion Motors (configurable):
 - Special model spiffs: dictionary mapping Vehicle_Model -> flat spiff per unit sold.
 - The module exposes:
     * compute_sale_commission(row)           -> sale-level commission (base + spiffs + returning bonus)
+    * compute_sale_commissions(df)           -> same as above for every row at once (columnar)
     * compute_leaderboard(df, month=None)   -> monthly leaderboard with full commission breakdown
+      (sale-level partials are reused across calls, and across runs with cache_dir)
+    * compute_leaderboard_incremental(df, state_path) -> same, recomputing only months whose sales changed
+    * SaleLevelAccumulator(config)           -> same, built chunk by chunk (add / merge / leaderboard)
     * recommended_config                     -> default config dict (for tuning)
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path
+import numpy as np
 import pandas as pd
 from typing import Dict
 
@@ -81,6 +91,77 @@ def compute_sale_commission(row, config=None):
         'Total_Sale_Level': round(total,2)
     }
 
+def _round2(values):
+    """Elementwise round(x, 2) with the builtin's exact results.
+    np.round scales by 100 first, which can tip values sitting on a half cent the other
+    way; the distinct values near a half cent are re-rounded with the builtin.
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = values * 100.0
+    out = np.rint(scaled) / 100.0   # what np.round(values, 2) computes
+    # |frac(scaled) - 0.5| < 1e-6 + |scaled| * 1e-13, in place to keep large batches cheap
+    frac = np.floor(scaled)
+    np.subtract(scaled, frac, out=frac)
+    frac -= 0.5
+    np.abs(frac, out=frac)
+    np.abs(scaled, out=scaled)
+    scaled *= 1e-13
+    scaled += 1e-6
+    near_half = frac < scaled
+    if near_half.any():
+        uniq, inverse = np.unique(values[near_half], return_inverse=True)
+        exact = np.array([round(float(v), 2) for v in uniq])
+        out[near_half] = exact[inverse]
+    return out
+
+def _numeric_column(df, col):
+    """Column as float array with the per-row defaults (missing column or None -> 0.0)."""
+    if col not in df.columns:
+        return np.zeros(len(df))
+    s = df[col]
+    if s.dtype == object:
+        s = s.map(lambda v: 0.0 if v is None else v)
+    return s.to_numpy(dtype=float)
+
+def compute_sale_commissions(df, config=None):
+    """Columnar compute_sale_commission over every row of df.
+    Returns a DataFrame (same index as df) with Base_Commission, Spiff, Returning_Bonus
+    and Total_Sale_Level, equal to the per-row function's rounded results.
+    """
+    cfg = DEFAULT_CONFIG if config is None else config
+    n = len(df)
+
+    # Base commission (prefer profit-based, fallback to price-based)
+    if cfg.get('base_commission_rate_on_price'):
+        base = cfg['base_commission_rate_on_price'] * _numeric_column(df, 'Price')
+    else:
+        base = cfg['base_commission_rate_on_profit'] * _numeric_column(df, 'Profit')
+
+    # Model spiff: look up each distinct model once, then broadcast via the codes
+    spiffs = cfg.get('model_spiffs', {})
+    if 'Vehicle_Model' in df.columns:
+        codes, models = pd.factorize(df['Vehicle_Model'])
+        lookup = np.array([float(spiffs.get(m, 0.0)) for m in models] + [float(spiffs.get(None, 0.0))])
+        spiff = lookup[codes]   # code -1 (missing model) picks the trailing None entry
+    else:
+        spiff = np.full(n, float(spiffs.get(None, 0.0)))
+    # per-sale flat spiff
+    spiff = spiff + cfg.get('per_sale_flat_spiff', 0.0)
+    # returning customer bonus
+    if 'Customer_Type' in df.columns:
+        is_returning = (df['Customer_Type'] == 'Returning').to_numpy(dtype=bool)
+    else:
+        is_returning = np.zeros(n, dtype=bool)
+    returning = np.where(is_returning, float(cfg.get('returning_customer_bonus', 0.0)), 0.0)
+
+    total = base + spiff + returning
+    return pd.DataFrame({
+        'Base_Commission': _round2(base),
+        'Spiff': _round2(spiff),
+        'Returning_Bonus': _round2(returning),
+        'Total_Sale_Level': _round2(total)
+    }, index=df.index)
+
 def _apply_tier_bonus(revenue, cfg):
     """Return tier bonus amount (flat $) based on revenue tiers in cfg."""
     for threshold, pct in cfg.get('tier_bonuses', []):
@@ -88,24 +169,85 @@ def _apply_tier_bonus(revenue, cfg):
             return revenue * pct
     return 0.0
 
-def compute_leaderboard(df, target_month=None, config=None):
-    """Compute salesperson monthly leaderboard and commission summary.
-    - target_month: period-like (e.g., '2025-10') or None to compute for all months.
-    Returns DataFrame with columns:
-    ['Salesperson','Month','Revenue','Units','Profit','Sale_Base_Com','Sale_Spiffs','Sale_ReturningBonuses',
-     'Base_Commission','Tier_Bonus','Quota_Accelerator','Unit_Target_Bonus','Total_Commission']
+def _tier_bonuses(revenue, tiers):
+    """Vectorized _apply_tier_bonus: revenue * pct of the first listed tier cleared, else 0.0.
+    Works for tier lists in any order: the tiers a revenue clears are a prefix of the
+    ascending thresholds, and the rule pays the one listed first within that prefix.
     """
-    cfg = DEFAULT_CONFIG if config is None else config
+    revenue = np.asarray(revenue, dtype=float)
+    if not tiers:
+        return np.zeros(len(revenue))
+    thresholds = np.array([t for t, _ in tiers], dtype=float)
+    pcts = np.array([p for _, p in tiers], dtype=float)
+    order = np.argsort(thresholds, kind='stable')
+    first_listed = np.minimum.accumulate(order)
+    k = np.searchsorted(thresholds[order], revenue, side='right') - 1
+    hit = (k >= 0) & ~np.isnan(revenue)
+    pct = pcts[first_listed[np.where(hit, k, 0)]]
+    return np.where(hit, revenue * pct, 0.0)
+
+def _monthly_bonuses(revenue, units, cfg):
+    """Monthly-stage bonuses for arrays of salesperson-month Revenue and Units.
+    Returns {'Tier_Bonus', 'Quota_Accelerator', 'Unit_Target_Bonus'} arrays.
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    # Tier bonuses based on monthly revenue thresholds
+    tier = _round2(_tier_bonuses(revenue, cfg.get('tier_bonuses', [])))
+    # Quota accelerator for revenue above monthly quota
+    quota = cfg.get('monthly_quota_revenue', 0.0)
+    acc_rate = cfg.get('quota_accelerator_rate', 0.0)
+    above = revenue > quota
+    acc = np.where(above, _round2(np.where(above, revenue - quota, 0.0) * acc_rate), 0.0)
+    # Unit target bonus
+    units_t = cfg.get('unit_target_bonus', {}).get('units_target', 999999)
+    units_bonus_amt = cfg.get('unit_target_bonus', {}).get('units_target_bonus_amount', 0.0)
+    unit = np.where(np.asarray(units) >= units_t, units_bonus_amt, 0.0)
+    return {'Tier_Bonus': tier, 'Quota_Accelerator': acc, 'Unit_Target_Bonus': unit}
+
+def _kahan_group_sums(values, groups, sums, comp):
+    """Add rows of values into sums[groups] in row order, with the compensated (Kahan)
+    recurrence of pandas' groupby sum; sums and comp (n_groups x ...) are updated in place.
+    Step k adds the k-th row of every group at once. Groups are ranked by size, so the
+    groups still active at step k are a prefix and every step works on contiguous slices.
+    """
+    if not len(groups):
+        return
+    counts = np.bincount(groups)
+    live = np.flatnonzero(counts)
+    by_size = live[np.argsort(-counts[live], kind='stable')]
+    rank = np.empty(len(counts), dtype=np.int64)
+    rank[by_size] = np.arange(len(by_size))
+    # Position of each row within its group, then rows ordered by (position, group rank)
+    order = np.argsort(groups, kind='stable')
+    starts = np.cumsum(counts) - counts
+    pos = np.arange(len(groups)) - starts[groups[order]]
+    steps = order[np.lexsort((rank[groups[order]], pos))]
+    flat = values[steps]
+    sizes = counts[by_size][::-1]
+    active = len(by_size) - np.searchsorted(sizes, np.arange(sizes[-1]), side='right')
+    bounds = np.concatenate([[0], np.cumsum(active)])
+    s, c = sums[by_size], comp[by_size]
+    for k, n in enumerate(active):
+        y = flat[bounds[k]:bounds[k + 1]] - c[:n]
+        t = s[:n] + y
+        c[:n] = (t - s[:n]) - y
+        s[:n] = t
+    sums[by_size], comp[by_size] = s, c
+
+def _with_month(df):
     dfc = df.copy()
     dfc['Date'] = pd.to_datetime(dfc['Date'])
     dfc['Month'] = dfc['Date'].dt.to_period('M')
+    return dfc
 
+def _sale_level_partials(dfc, cfg):
+    """Sale-level stage: per (Salesperson, Month) sums of sales and sale-level commissions."""
     # Sale-level commissions
-    sale_comps = dfc.apply(lambda r: pd.Series(compute_sale_commission(r, cfg)), axis=1)
+    sale_comps = compute_sale_commissions(dfc, cfg)
     dfc = pd.concat([dfc.reset_index(drop=True), sale_comps.reset_index(drop=True)], axis=1)
 
     # Aggregate monthly per salesperson
-    agg = dfc.groupby(['Salesperson','Month']).agg(
+    return dfc.groupby(['Salesperson','Month'], observed=True).agg(
         Revenue = ('Price','sum'),
         Units = ('Quantity','sum'),
         Profit = ('Profit','sum'),
@@ -114,21 +256,13 @@ def compute_leaderboard(df, target_month=None, config=None):
         Sale_ReturningBonuses = ('Returning_Bonus','sum')
     ).reset_index()
 
-    # Tier bonuses based on monthly revenue thresholds
-    agg['Tier_Bonus'] = agg['Revenue'].apply(lambda r: round(_apply_tier_bonus(r, cfg),2))
-    # Quota accelerator for revenue above monthly quota
-    quota = cfg.get('monthly_quota_revenue', 0.0)
-    acc_rate = cfg.get('quota_accelerator_rate', 0.0)
-    def _quota_acc(r):
-        if r > quota:
-            incremental = r - quota
-            return round(incremental * acc_rate,2)
-        return 0.0
-    agg['Quota_Accelerator'] = agg['Revenue'].apply(_quota_acc)
-    # Unit target bonus
-    units_t = cfg.get('unit_target_bonus', {}).get('units_target', 999999)
-    units_bonus_amt = cfg.get('unit_target_bonus', {}).get('units_target_bonus_amount', 0.0)
-    agg['Unit_Target_Bonus'] = agg['Units'].apply(lambda u: units_bonus_amt if u >= units_t else 0.0)
+def _finalize_leaderboard(agg, cfg, target_month=None):
+    """Monthly stage: bonuses and totals on top of the sale-level partials."""
+    agg = agg.copy()
+    # Tier bonuses, quota accelerator and unit target bonus (array ops over all rows)
+    bonuses = _monthly_bonuses(agg['Revenue'].to_numpy(), agg['Units'].to_numpy(), cfg)
+    for col, values in bonuses.items():
+        agg[col] = values
 
     # Total commission calculation
     agg['Base_Commission'] = agg['Sale_Base_Com'] + agg['Sale_Spiffs'] + agg['Sale_ReturningBonuses']
@@ -145,6 +279,245 @@ def compute_leaderboard(df, target_month=None, config=None):
     agg = agg.sort_values(['Month','Revenue'], ascending=[False,False])
     return agg
 
+# Config fields read by the sale-level stage; only these invalidate cached partials
+SALE_LEVEL_KEYS = ('base_commission_rate_on_profit', 'base_commission_rate_on_price',
+                   'returning_customer_bonus', 'per_sale_flat_spiff', 'model_spiffs')
+# Columns the sale-level partials depend on (besides Month)
+PARTIAL_INPUT_COLUMNS = ['Salesperson', 'Price', 'Quantity', 'Profit', 'Vehicle_Model', 'Customer_Type']
+
+# (sale-level config key, data version) -> sale-level partials, most recent last
+_SALE_LEVEL_CACHE = OrderedDict()
+SALE_LEVEL_CACHE_SIZE = 8   # entries in memory, and files kept in a cache_dir
+
+def config_key(cfg, keys=SALE_LEVEL_KEYS):
+    """Stable hash of the given config fields."""
+    subset = {k: cfg.get(k) for k in keys}
+    blob = json.dumps(subset, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+def data_version(df):
+    """Content hash of the columns the sale-level stage reads (including each row's month)."""
+    cols = [c for c in PARTIAL_INPUT_COLUMNS if c in df.columns]
+    h = hashlib.sha256(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    h.update(_month_ordinals(pd.to_datetime(df['Date'])).tobytes())
+    return h.hexdigest()[:16]
+
+def clear_sale_level_cache():
+    _SALE_LEVEL_CACHE.clear()
+
+def _read_partials(path):
+    try:
+        agg = pd.read_pickle(path)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print('Ignoring unreadable sale-level cache', path.name, '-', e)
+        return None
+    os.utime(path)   # mtime orders the files for pruning, most recently used last
+    return agg
+
+def _write_partials(agg, cache_dir, path):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    pd.to_pickle(agg, tmp)
+    os.replace(tmp, path)
+    files = sorted(cache_dir.glob('sale_level-*.pkl'), key=lambda p: p.stat().st_mtime)
+    for stale in files[:-SALE_LEVEL_CACHE_SIZE]:
+        stale.unlink(missing_ok=True)
+
+def _cached_sale_level_partials(df, cfg, version=None, cache_dir=None):
+    """Sale-level partials, reused when the sale-level config and data are unchanged.
+    With cache_dir they are also saved to disk, so the next run (e.g. after a tier or
+    quota change) skips the sale-level stage."""
+    key = (config_key(cfg), version or data_version(df))
+    if key in _SALE_LEVEL_CACHE:
+        _SALE_LEVEL_CACHE.move_to_end(key)
+        return _SALE_LEVEL_CACHE[key]
+    path = None if cache_dir is None else Path(cache_dir) / f'sale_level-{key[0]}-{key[1]}.pkl'
+    agg = None if path is None else _read_partials(path)
+    if agg is None:
+        agg = _sale_level_partials(_with_month(df), cfg)
+        if path is not None:
+            try:
+                _write_partials(agg, path.parent, path)
+            except OSError as e:
+                print('Could not write sale-level cache:', e)
+    _SALE_LEVEL_CACHE[key] = agg
+    while len(_SALE_LEVEL_CACHE) > SALE_LEVEL_CACHE_SIZE:
+        _SALE_LEVEL_CACHE.popitem(last=False)
+    return agg
+
+def compute_leaderboard(df, target_month=None, config=None, version=None, use_cache=True, cache_dir=None):
+    """Compute salesperson monthly leaderboard and commission summary.
+    - target_month: period-like (e.g., '2025-10') or None to compute for all months.
+    - version: optional data version of df (e.g. the CSV fingerprint); computed from the
+      data when omitted.
+    - use_cache: reuse sale-level results from an earlier call with the same data and the
+      same sale-level config fields (SALE_LEVEL_KEYS), so tier/quota-only changes only
+      rerun the monthly stage.
+    - cache_dir: also keep the sale-level results in this directory, keyed on the sale-level
+      config and version, so they are reused by later processes (pass a version that
+      identifies the data, e.g. the CSV fingerprint, to avoid hashing every row).
+    Returns DataFrame with columns:
+    ['Salesperson','Month','Revenue','Units','Profit','Sale_Base_Com','Sale_Spiffs','Sale_ReturningBonuses',
+     'Base_Commission','Tier_Bonus','Quota_Accelerator','Unit_Target_Bonus','Total_Commission']
+    """
+    cfg = DEFAULT_CONFIG if config is None else config
+    if use_cache:
+        agg = _cached_sale_level_partials(df, cfg, version, cache_dir)
+    else:
+        agg = _sale_level_partials(_with_month(df), cfg)
+    return _finalize_leaderboard(agg, cfg, target_month)
+
+def _month_ordinals(dates):
+    """Monthly period ordinals (months since 1970-01, as in Period('M').ordinal) for dates."""
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+def _month_digests(df, ordinals):
+    """Order-independent content digest of the partial inputs, keyed by month ordinal."""
+    cols = [c for c in PARTIAL_INPUT_COLUMNS if c in df.columns]
+    row_hash = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    if not len(ordinals):
+        return {}
+    first = ordinals.min()
+    slot = ordinals - first
+    # Sum of row hashes (wrapping mod 2**64) plus row count: reordering rows keeps the digest
+    counts = np.bincount(slot)
+    sums = np.zeros(len(counts), dtype=np.uint64)
+    np.add.at(sums, slot, row_hash)
+    return {int(first + i): (int(sums[i]), int(counts[i])) for i in np.flatnonzero(counts)}
+
+def compute_leaderboard_incremental(df, state_path, target_month=None, config=None):
+    """compute_leaderboard that reuses per-(Salesperson, Month) partials saved at state_path.
+    Only months whose rows changed since the last run (or every month, after a change to
+    the sale-level config) go through the sale-level stage; the cheap monthly stage runs
+    over all months. Returns the same frame as compute_leaderboard.
+    """
+    cfg = DEFAULT_CONFIG if config is None else config
+    state_path = Path(state_path)
+    ordinals = _month_ordinals(pd.to_datetime(df['Date']))
+    digests = _month_digests(df, ordinals)
+    key = config_key(cfg)
+
+    state = None
+    if state_path.exists():
+        try:
+            state = pd.read_pickle(state_path)
+        except Exception as e:
+            print('Ignoring unreadable leaderboard state:', e)
+    if state is None or state.get('config_key') != key:
+        state = {'config_key': key, 'digests': {}, 'partials': None}
+
+    changed = [m for m, d in digests.items() if state['digests'].get(m) != d]
+    partials = state['partials']
+    if partials is not None:
+        # Keep partials of months that are still present and unchanged
+        unchanged = list(set(digests) - set(changed))
+        partials = partials[np.isin(pd.PeriodIndex(partials['Month']).asi8, unchanged)]
+    if changed or partials is None:
+        # Only the rows of changed months go through the sale-level stage
+        fresh = _sale_level_partials(_with_month(df[np.isin(ordinals, changed)]), cfg)
+        partials = fresh if partials is None else pd.concat([partials, fresh], ignore_index=True)
+    if isinstance(df['Salesperson'].dtype, pd.CategoricalDtype):
+        # concat of differing dictionaries gives object: restore the full frame's dictionary,
+        # the schema's values, then extras sorted (as SaleLevelAccumulator.partials)
+        known = [str(v) for v in df['Salesperson'].cat.categories]
+        extra = sorted(set(partials['Salesperson'].astype(str)) - set(known))
+        partials['Salesperson'] = partials['Salesperson'].astype(str).astype(pd.CategoricalDtype(known + extra))
+    # Same row order as a single groupby over the full frame
+    partials = partials.sort_values(['Salesperson', 'Month']).reset_index(drop=True)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix('.tmp')
+    pd.to_pickle({'config_key': key, 'digests': digests, 'partials': partials}, tmp)
+    os.replace(tmp, state_path)
+    print(f'Leaderboard: recomputed {len(changed)} of {len(digests)} months')
+    return _finalize_leaderboard(partials, cfg, target_month)
+
+
+class SaleLevelAccumulator:
+    """Sale-level partials for data that arrives in chunks (e.g. read_csv(chunksize=...)).
+
+    add() folds one chunk into running per-(Salesperson, Month) totals, so memory is
+    bounded by the number of salesperson-months, not rows. Integer columns are plain sums.
+    Commission columns are summed with the same compensated (Kahan) recurrence pandas'
+    groupby sum uses, with the compensation carried across chunks: adding the chunks in
+    file order gives bit-identical partials to _sale_level_partials on the whole frame.
+    merge() combines accumulators built on disjoint rows; the commission sums of a merge
+    may differ from a single pass in the last bit.
+    """
+    SUMS = ['Revenue', 'Units', 'Profit']
+    COMMISSIONS = ['Sale_Base_Com', 'Sale_Spiffs', 'Sale_ReturningBonuses']
+
+    def __init__(self, config=None):
+        self.cfg = DEFAULT_CONFIG if config is None else config
+        self.keys = []                # (Salesperson, month ordinal) per slot
+        self.slots = {}
+        self.ints = np.zeros((0, 3), dtype=np.int64)
+        self.sums = np.zeros((0, 3))
+        self.comp = np.zeros((0, 3))  # Kahan compensation of self.sums
+        self.salesperson_dtype = None # categorical dtype of the first chunk, if any
+
+    def _slots_for(self, keys):
+        new = [k for k in keys if k not in self.slots]
+        for k in new:
+            self.slots[k] = len(self.keys)
+            self.keys.append(k)
+        if new:
+            pad = len(new)
+            self.ints = np.vstack([self.ints, np.zeros((pad, 3), dtype=np.int64)])
+            self.sums = np.vstack([self.sums, np.zeros((pad, 3))])
+            self.comp = np.vstack([self.comp, np.zeros((pad, 3))])
+        return np.array([self.slots[k] for k in keys], dtype=np.int64)
+
+    def add(self, df):
+        if self.salesperson_dtype is None and isinstance(df['Salesperson'].dtype, pd.CategoricalDtype):
+            self.salesperson_dtype = df['Salesperson'].dtype
+        dates = pd.to_datetime(df['Date'])
+        keep = (df['Salesperson'].notna() & dates.notna()).to_numpy()
+        df, dates = df[keep], dates[keep]
+        if not len(df):
+            return self
+        comps = compute_sale_commissions(df, self.cfg)
+        values = comps[['Base_Commission', 'Spiff', 'Returning_Bonus']].to_numpy()
+
+        # (salesperson, month) as one integer per row, so only the distinct pairs leave numpy
+        sp_codes, people = pd.factorize(df['Salesperson'])
+        months = _month_ordinals(dates)
+        first, span = months.min(), months.max() - months.min() + 1
+        codes, uniques = pd.factorize(sp_codes.astype(np.int64) * span + (months - first))
+        slot = self._slots_for([(str(people[u // span]), int(first + u % span)) for u in uniques])[codes]
+        ints = np.column_stack([_numeric_column(df, c).astype(np.int64) for c in ('Price', 'Quantity', 'Profit')])
+        np.add.at(self.ints, slot, ints)
+        _kahan_group_sums(values, slot, self.sums, self.comp)
+        return self
+
+    def merge(self, other):
+        self.salesperson_dtype = self.salesperson_dtype or other.salesperson_dtype
+        slot = self._slots_for(other.keys)
+        self.ints[slot] += other.ints
+        self.sums[slot] += other.sums
+        return self
+
+    def partials(self):
+        """Totals in the _sale_level_partials layout and row order."""
+        columns = ['Salesperson', 'Month', *self.SUMS, *self.COMMISSIONS]
+        agg = pd.DataFrame(self.ints, columns=self.SUMS)
+        agg[self.COMMISSIONS] = self.sums
+        agg.insert(0, 'Salesperson', [k[0] for k in self.keys])
+        agg.insert(1, 'Month', pd.PeriodIndex.from_ordinals([k[1] for k in self.keys], freq='M'))
+        if self.salesperson_dtype is not None:
+            # The dictionary the full frame would get: the schema's values, then extras sorted
+            known = [str(v) for v in self.salesperson_dtype.categories]
+            extra = sorted(set(agg['Salesperson']) - set(known))
+            agg['Salesperson'] = agg['Salesperson'].astype(pd.CategoricalDtype(known + extra))
+        return agg.sort_values(['Salesperson', 'Month']).reset_index(drop=True)[columns]
+
+    def leaderboard(self, target_month=None):
+        """compute_leaderboard over every row added so far."""
+        return _finalize_leaderboard(self.partials(), self.cfg, target_month)
+
+
 if __name__ == '__main__':
     # quick test / demo when run directly
     import pandas as pd, json
@@ -0,0 +1,156 @@
+"""commission_sweep.py
+
+What-if sweep over many candidate commission plans (configs in the DEFAULT_CONFIG format).
+- The per-(Salesperson, Month) grouping is done once for all plans.
+- Spiffs and returning-customer bonuses are summed once per distinct set of those fields.
+- Base commissions of every distinct base rate in a batch are computed in one pass, as a
+  (rows x rates) matrix of rounded per-sale amounts summed per group with the same
+  compensated sum pandas' groupby uses (row blocks bound the matrix size).
+- The monthly stage (tiers, quota accelerator, unit target) is evaluated for a whole
+  batch of plans at once as (plans x salesperson-months) arrays.
+- Batches can be spread over a process pool (processes > 1).
+- The module exposes:
+    * sweep_plans(df, configs, labels=None, processes=None)
+        -> DataFrame plan x salesperson of total commission over the whole history,
+           equal to summing compute_leaderboard(df, config=plan)['Total_Commission']
+           per salesperson.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from commission_calc import (DEFAULT_CONFIG, _kahan_group_sums, _numeric_column, _round2, _with_month,
+                             compute_sale_commissions, config_key)
+
+# Plans evaluated per array batch; bounds the (plans x groups x tiers) temporaries
+BATCH_SIZE = 64
+# Elements of one (rows x rates) block of per-sale base commissions
+BLOCK_ELEMENTS = 1 << 22
+# Sale-level fields other than the base rate
+EXTRA_KEYS = ('returning_customer_bonus', 'per_sale_flat_spiff', 'model_spiffs')
+
+# Inputs shared by every batch; set in-process or once per pool worker
+_STATE = {}
+
+
+def _init_state(sales, group_codes, n_groups, revenue, units):
+    _STATE.update(sales=sales, group_codes=group_codes, n_groups=n_groups,
+                  revenue=revenue, units=units)
+
+
+def _base_rule(cfg):
+    """(column, rate) of the base commission, as in compute_sale_commission."""
+    if cfg.get('base_commission_rate_on_price'):
+        return 'Price', cfg['base_commission_rate_on_price']
+    return 'Profit', cfg['base_commission_rate_on_profit']
+
+
+def _base_totals(rules):
+    """Per-group Sale_Base_Com for each distinct (column, rate), {rule: array}."""
+    codes, n_groups = _STATE['group_codes'], _STATE['n_groups']
+    out = {}
+    for col in sorted({c for c, _ in rules}):
+        rates = np.array(sorted({r for c, r in rules if c == col}), dtype=float)
+        values = _numeric_column(_STATE['sales'], col)
+        sums, comp = np.zeros((n_groups, len(rates))), np.zeros((n_groups, len(rates)))
+        step = max(1, BLOCK_ELEMENTS // len(rates))
+        for lo in range(0, len(values), step):
+            # rate * value rounded per sale, exactly as compute_sale_commissions does
+            block = _round2(rates[None, :] * values[lo:lo + step, None])
+            _kahan_group_sums(block, codes[lo:lo + step], sums, comp)
+        out.update({(col, r): sums[:, i] for i, r in enumerate(rates.tolist())})
+    return out
+
+
+def _extra_totals(cfg):
+    """Per-group (Sale_Spiffs, Sale_ReturningBonuses) for one plan."""
+    comps = compute_sale_commissions(_STATE['sales'], cfg)
+    sums = comps[['Spiff', 'Returning_Bonus']].groupby(_STATE['group_codes']).sum()
+    sums = sums.reindex(range(_STATE['n_groups']), fill_value=0.0)
+    return sums['Spiff'].to_numpy(), sums['Returning_Bonus'].to_numpy()
+
+
+def _monthly_bonus_matrix(cfgs):
+    """Tier + quota accelerator + unit target bonuses, shape (len(cfgs), n_groups)."""
+    revenue, units = _STATE['revenue'], _STATE['units']
+    n_tiers = max(1, max(len(c.get('tier_bonuses', [])) for c in cfgs))
+    # Pad tier lists with unreachable thresholds so every plan has n_tiers entries
+    thresholds = np.full((len(cfgs), n_tiers), np.inf)
+    pcts = np.zeros((len(cfgs), n_tiers))
+    for p, c in enumerate(cfgs):
+        for k, (threshold, pct) in enumerate(c.get('tier_bonuses', [])):
+            thresholds[p, k], pcts[p, k] = threshold, pct
+    # First listed tier the revenue clears, as in _apply_tier_bonus
+    clears = revenue[None, :, None] >= thresholds[:, None, :]
+    first = clears.argmax(axis=2)
+    hit = clears.any(axis=2)
+    pct = np.take_along_axis(pcts, first, axis=1)
+    tier = _round2(np.where(hit, revenue * pct, 0.0))
+
+    quota = np.array([c.get('monthly_quota_revenue', 0.0) for c in cfgs], dtype=float)[:, None]
+    acc_rate = np.array([c.get('quota_accelerator_rate', 0.0) for c in cfgs], dtype=float)[:, None]
+    above = revenue > quota
+    acc = np.where(above, _round2(np.where(above, revenue - quota, 0.0) * acc_rate), 0.0)
+
+    units_t = np.array([c.get('unit_target_bonus', {}).get('units_target', 999999) for c in cfgs])[:, None]
+    units_amt = np.array([c.get('unit_target_bonus', {}).get('units_target_bonus_amount', 0.0)
+                          for c in cfgs], dtype=float)[:, None]
+    unit = np.where(units >= units_t, units_amt, 0.0)
+    return tier, acc, unit
+
+
+def _evaluate_batch(cfgs):
+    """Total_Commission per (plan, salesperson-month) for a batch of plans."""
+    rules = [_base_rule(c) for c in cfgs]
+    base_totals = _base_totals(set(rules))
+    extra_totals = {}
+    base = np.empty((len(cfgs), _STATE['n_groups']))
+    for p, c in enumerate(cfgs):
+        key = config_key(c, EXTRA_KEYS)
+        if key not in extra_totals:
+            extra_totals[key] = _extra_totals(c)
+        spiffs, returning = extra_totals[key]
+        # Same order of additions as the leaderboard's Base_Commission
+        base[p] = base_totals[rules[p]] + spiffs + returning
+    tier, acc, unit = _monthly_bonus_matrix(cfgs)
+    return np.round(base + tier + acc + unit, 2)
+
+
+def sweep_plans(df, configs, labels=None, processes=None):
+    """Total commission per salesperson over the full history for each plan in configs.
+    - configs: list of plan dicts; missing keys fall back to DEFAULT_CONFIG.
+    - labels: optional plan names (default 'plan_0', 'plan_1', ...).
+    - processes: evaluate batches across a process pool of this size (default: in-process).
+    """
+    cfgs = [{**DEFAULT_CONFIG, **c} for c in configs]
+    labels = list(labels) if labels is not None else [f'plan_{i}' for i in range(len(cfgs))]
+    if not cfgs:
+        return pd.DataFrame(index=pd.Index(labels, name='Plan'))
+
+    dfc = _with_month(df)
+    grouped = dfc.groupby(['Salesperson', 'Month'], observed=True)
+    group_codes = grouped.ngroup().to_numpy()
+    sums = grouped.agg(Revenue=('Price', 'sum'), Units=('Quantity', 'sum')).reset_index()
+    sales = dfc[[c for c in ('Profit', 'Price', 'Vehicle_Model', 'Customer_Type') if c in dfc.columns]]
+    state = (sales, group_codes, len(sums),
+             sums['Revenue'].to_numpy(dtype=float), sums['Units'].to_numpy())
+
+    batches = [cfgs[i:i + BATCH_SIZE] for i in range(0, len(cfgs), BATCH_SIZE)]
+    if processes and processes > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_state, initargs=state) as pool:
+            totals = np.vstack(list(pool.map(_evaluate_batch, batches)))
+    else:
+        _init_state(*state)
+        try:
+            totals = np.vstack([_evaluate_batch(b) for b in batches])
+        finally:
+            _STATE.clear()
+
+    # Groups are ordered by (Salesperson, Month): each salesperson is one contiguous run
+    people = sums['Salesperson']
+    starts = np.flatnonzero(np.r_[True, people.to_numpy()[1:] != people.to_numpy()[:-1]])
+    matrix = np.add.reduceat(totals, starts, axis=1) if len(starts) else totals[:, :0]
+    return pd.DataFrame(matrix, index=pd.Index(labels, name='Plan'),
+                        columns=pd.Index(people.iloc[starts].tolist(), name='Salesperson'))
@@ -0,0 +1,366 @@
+"""forecasting.py
+
+Per-series forecasters and batch (per-segment) forecasting for Stallion Motors revenue.
+- Series are monthly pd.Series indexed by month-end timestamps.
+- prophet_forecast / arima_forecast fit one series; Prophet and pmdarima are imported
+  lazily, so this module loads without them.
+- warm_forecast persists the fitted Prophet parameters / ARIMA order and coefficients as
+  JSON and starts the next run from them, running a full fit only when the series drifts.
+- numpy_forecast_batch is a dependency-free additive Holt-Winters (ETS A,A,A) fitted to a
+  whole matrix of series at once, with smoothing parameters picked per series from a small
+  grid by one-step-ahead SSE; series shorter than two seasons use seasonal naive.
+- forecast_segments builds the monthly revenue series of every Region, Dealer_Branch and
+  Vehicle_Model value from one groupby, fits them across a process pool and returns one
+  long-format table. Each series tries Prophet first and degrades to ARIMA, then to the
+  NumPy forecaster, when a model fails or exceeds the per-task timeout.
+- The module exposes:
+    * prophet_forecast(series, periods)      -> ds, yhat, yhat_lower, yhat_upper (history + future)
+    * arima_forecast(series, periods)        -> ds, yhat, yhat_lower, yhat_upper (future)
+    * warm_forecast(model, series, periods, state_path, ...) -> (forecast, full_fit) reusing the last fit
+    * series_drift(series, state)            -> drift of series since the fit recorded in state
+    * numpy_forecast(series, periods)        -> ds, yhat, yhat_lower, yhat_upper (history + future)
+    * numpy_forecast_batch(Y, periods)       -> fitted, forecast, sigma, method for a (series x months) matrix
+    * segment_series(df, dims)               -> {(dim, value): monthly revenue series}
+    * forecast_segments(df, dims, ...)       -> long-format forecast table
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import signal
+import threading
+
+import numpy as np
+import pandas as pd
+
+SEGMENT_DIMS = ('Region', 'Dealer_Branch', 'Vehicle_Model')
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+SEASON = 12
+
+# Holt-Winters smoothing grid (alpha: level, beta: trend, gamma: season)
+HW_ALPHAS = (0.1, 0.3, 0.5, 0.8)
+HW_BETAS = (0.01, 0.1, 0.3)
+HW_GAMMAS = (0.05, 0.2, 0.5)
+# Warm-started fits are reused until the data drifts past this fraction (see series_drift)
+DRIFT_THRESHOLD = 0.10
+# ... or this many months have been added since the last full fit / order search
+WARM_MAX_MONTHS = 12
+# z for an 80% interval, the width Prophet reports by default
+INTERVAL_Z = 1.2816
+
+
+def _prophet_fit(series, init=None):
+    from prophet import Prophet
+    m = Prophet(yearly_seasonality=True, weekly_seasonality=False, daily_seasonality=False)
+    history = pd.DataFrame({'ds': pd.to_datetime(series.index), 'y': series.to_numpy()})
+    # init replaces Prophet's default starting point, so only pass it for warm starts
+    return m.fit(history) if init is None else m.fit(history, init=init)
+
+
+def _prophet_predict(model, periods):
+    future = model.make_future_dataframe(periods=periods, freq='M')
+    return model.predict(future)[FORECAST_COLUMNS]
+
+
+def _prophet_params(model):
+    # The init format Prophet accepts for warm starts (scalars k, m, sigma_obs; vectors delta, beta)
+    params = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    params.update({name: model.params[name][0].tolist() for name in ('delta', 'beta')})
+    return params
+
+
+def prophet_forecast(series, periods=6):
+    return _prophet_predict(_prophet_fit(series), periods)
+
+
+def _arima_fit(series, order=None, seasonal_order=None, start_params=None):
+    """auto_arima order search, or a single fit of a known order when one is given."""
+    import pmdarima as pm
+    if order is None:
+        return pm.auto_arima(series, seasonal=True, m=SEASON, error_action='ignore', suppress_warnings=True)
+    model = pm.ARIMA(order=tuple(order), seasonal_order=tuple(seasonal_order),
+                     start_params=None if start_params is None else np.asarray(start_params),
+                     suppress_warnings=True)
+    return model.fit(series)
+
+
+def _arima_predict(model, series, periods):
+    fc, conf = model.predict(n_periods=periods, return_conf_int=True)
+    future_index = pd.date_range(series.index.max() + pd.offsets.MonthBegin(1), periods=periods, freq='M')
+    conf = np.asarray(conf)
+    return pd.DataFrame({'ds': future_index, 'yhat': np.asarray(fc),
+                         'yhat_lower': conf[:, 0], 'yhat_upper': conf[:, 1]})
+
+
+def _arima_params(model):
+    return {'order': list(model.order), 'seasonal_order': list(model.seasonal_order),
+            'start_params': np.asarray(model.params()).tolist()}
+
+
+def arima_forecast(series, periods=6):
+    series = series.copy()
+    series.index = pd.to_datetime(series.index)
+    return _arima_predict(_arima_fit(series), series, periods)
+
+
+def series_drift(series, state):
+    """How far series has moved from the fit recorded in state: the larger of the relative
+    restatement of months already fitted and the MAPE of the stored forecast on months
+    observed since. inf when the two cannot be compared (history shrank or a gap)."""
+    old = pd.Series(state['history']['y'], index=pd.to_datetime(state['history']['ds']))
+    if not old.index.isin(series.index).all():
+        return np.inf
+    drift = (series[old.index] - old).abs().sum() / max(old.abs().sum(), 1e-9)
+    new = series[series.index > old.index.max()]
+    forecast = pd.Series(state['forecast']['yhat'], index=pd.to_datetime(state['forecast']['ds']))
+    if not new.index.isin(forecast.index).all():
+        return np.inf
+    actual = new[new != 0]
+    if len(actual):
+        drift = max(drift, ((actual - forecast[actual.index]).abs() / actual.abs()).mean())
+    return float(drift)
+
+
+def _read_state(path, model):
+    try:
+        state = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    return state if state.get('model') == model else None
+
+
+def _write_state(path, state):
+    path = Path(path)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, path)
+
+
+def warm_forecast(model, series, periods, state_path, drift_threshold=DRIFT_THRESHOLD, refit=False):
+    """Prophet or ARIMA forecast that reuses the previous run's fit stored in state_path (JSON).
+    - prophet: the previous parameters initialize the optimizer (warm start).
+    - arima: the previous order is refitted directly (start_params = previous
+      coefficients) instead of rerunning the auto_arima search.
+    A full fit runs when refit is set, there is no usable state, series_drift exceeds
+    drift_threshold, the last full fit is WARM_MAX_MONTHS old, or the warm fit fails.
+    Returns (forecast frame, full_fit) and rewrites state_path.
+    """
+    series = series.copy()
+    series.index = pd.to_datetime(series.index)
+    state = None if refit else _read_state(state_path, model)
+    full = (state is None or series_drift(series, state) > drift_threshold
+            or len(series) - state['full_fit_months'] >= WARM_MAX_MONTHS)
+
+    fitted = None
+    if not full:
+        try:
+            if model == 'prophet':
+                fitted = _prophet_fit(series, init=state['params'])
+            else:
+                fitted = _arima_fit(series, **state['params'])
+        except Exception as e:   # e.g. parameter shapes changed; fall back to a full fit
+            print(f'{model} warm start failed, refitting from scratch:', e)
+            full = True
+    if fitted is None:
+        fitted = _prophet_fit(series) if model == 'prophet' else _arima_fit(series)
+
+    if model == 'prophet':
+        forecast, params = _prophet_predict(fitted, periods), _prophet_params(fitted)
+    else:
+        forecast, params = _arima_predict(fitted, series, periods), _arima_params(fitted)
+    future = forecast[forecast['ds'] > series.index.max()]
+    _write_state(state_path, {
+        'model': model,
+        'full_fit_months': len(series) if full else state['full_fit_months'],
+        'history': {'ds': series.index.strftime('%Y-%m-%d').tolist(), 'y': series.tolist()},
+        'forecast': {'ds': future['ds'].dt.strftime('%Y-%m-%d').tolist(), 'yhat': future['yhat'].tolist()},
+        'params': params,
+    })
+    return forecast, full
+
+
+def _holt_winters(Y, alpha, beta, gamma, m):
+    """Additive Holt-Winters over rows of Y with per-row parameters.
+    Returns (one-step fitted values, final level, final trend, final seasonal state)."""
+    # Time-major copies so every step reads and writes contiguous rows
+    Yt = np.ascontiguousarray(Y.T)
+    level = Yt[:m].mean(axis=0)
+    trend = (Yt[m:2 * m].mean(axis=0) - level) / m
+    season = Yt[:m] - level
+    fitted = np.empty_like(Yt)
+    for t in range(len(Yt)):
+        s = season[t % m].copy()
+        fitted[t] = level + trend + s
+        new_level = alpha * (Yt[t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[t % m] = gamma * (Yt[t] - new_level) + (1 - gamma) * s
+        level = new_level
+    return fitted.T, level, trend, season.T
+
+
+def _numpy_fit(Y, m=SEASON):
+    """Fit every row of Y (series x months, no gaps); returns the state _numpy_predict needs."""
+    Y = np.asarray(Y, dtype=float)
+    n, T = Y.shape
+    if T < 2 * m:
+        # Seasonal naive: repeat the last observed season (or last value if shorter)
+        lag = m if T >= m else 1
+        fitted = np.full_like(Y, np.nan)
+        fitted[:, lag:] = Y[:, :-lag]
+        resid = Y[:, lag:] - fitted[:, lag:]
+        sigma = resid.std(axis=1) if resid.shape[1] else np.zeros(n)
+        return {'method': 'seasonal_naive', 'fitted': fitted, 'sigma': sigma, 'last': Y[:, T - lag:]}
+
+    # Every (series, parameter set) pair is one row of a single stacked recursion
+    grid = np.array([(a, b, g) for a in HW_ALPHAS for b in HW_BETAS for g in HW_GAMMAS])
+    k = len(grid)
+    stacked = np.repeat(Y, k, axis=0)
+    alpha, beta, gamma = (np.tile(grid[:, i], n) for i in range(3))
+    fitted, level, trend, season = _holt_winters(stacked, alpha, beta, gamma, m)
+    # Score on one-step errors after the first season (initialization window)
+    sse = ((stacked[:, m:] - fitted[:, m:]) ** 2).sum(axis=1).reshape(n, k)
+    rows = np.arange(n) * k + sse.argmin(axis=1)
+
+    fitted = fitted[rows]
+    return {'method': 'holt_winters', 'fitted': fitted, 'sigma': (Y[:, m:] - fitted[:, m:]).std(axis=1),
+            'level': level[rows], 'trend': trend[rows], 'season': season[rows], 'T': T, 'm': m}
+
+
+def _numpy_predict(state, periods):
+    """Point forecasts (n, periods) from a _numpy_fit state."""
+    h = np.arange(1, periods + 1)
+    if state['method'] == 'seasonal_naive':
+        last = state['last']
+        return last[:, (h - 1) % last.shape[1]]
+    T, m = state['T'], state['m']
+    return state['level'][:, None] + h * state['trend'][:, None] + state['season'][:, (T + h - 1) % m]
+
+
+def numpy_forecast_batch(Y, periods=6, m=SEASON):
+    """Forecast every row of Y (series x months, no gaps).
+    Returns (fitted (n, T), forecast (n, periods), sigma (n,), method) where sigma is the
+    one-step residual std and method is 'holt_winters' or 'seasonal_naive'.
+    """
+    state = _numpy_fit(Y, m)
+    return state['fitted'], _numpy_predict(state, periods), state['sigma'], state['method']
+
+
+def numpy_forecast(series, periods=6):
+    """Holt-Winters forecast of one series in the prophet_forecast output schema."""
+    index = pd.to_datetime(series.index)
+    fitted, forecast, sigma, _ = numpy_forecast_batch(series.to_numpy()[None, :], periods)
+    future = pd.date_range(index.max() + pd.offsets.MonthBegin(1), periods=periods, freq='M')
+    yhat = np.concatenate([fitted[0], forecast[0]])
+    # History bands use the one-step error; future bands widen with the horizon
+    width = INTERVAL_Z * sigma[0] * np.concatenate([np.ones(len(index)), np.sqrt(np.arange(1, periods + 1))])
+    return pd.DataFrame({'ds': index.append(future), 'yhat': yhat,
+                         'yhat_lower': yhat - width, 'yhat_upper': yhat + width})
+
+
+def segment_series(df, dims=SEGMENT_DIMS):
+    """Monthly revenue (sum of Price) per value of each dim, with empty months as 0."""
+    month = df['Date'].dt.to_period('M').dt.end_time.dt.normalize().rename('ds')
+    # One groupby at the finest grain; each dim is then a cheap roll-up of it
+    base = df.groupby([*(df[d] for d in dims), month], observed=True)['Price'].sum()
+    months = pd.date_range(month.min(), month.max(), freq='M')
+    out = {}
+    for dim in dims:
+        rolled = base.groupby(level=[dim, 'ds'], observed=True).sum()
+        for value, s in rolled.groupby(level=dim, observed=True):
+            out[(dim, value)] = s.droplevel(dim).reindex(months, fill_value=0).astype(float)
+    return out
+
+
+class _TaskTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds):
+    """Raise _TaskTimeout after `seconds` (Unix main thread only; otherwise no limit)."""
+    if (not seconds or not hasattr(signal, 'SIGALRM')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+    def _alarm(signum, frame):
+        raise _TaskTimeout(f'exceeded {seconds}s')
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.alarm(int(np.ceil(seconds)))
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+_MODELS = {'prophet': prophet_forecast, 'arima': arima_forecast, 'numpy': numpy_forecast}
+
+
+def _fit_one(series, periods, timeout, models=('prophet', 'arima', 'numpy')):
+    """Forecast one series with the first model that succeeds.
+    Returns (frame or None, model, errors)."""
+    errors = []
+    for name in models:
+        try:
+            with _time_limit(timeout):
+                fc = _MODELS[name](series, periods)
+            # Long table holds the forecast horizon only
+            return fc[fc['ds'] > series.index.max()].reset_index(drop=True), name, errors
+        except Exception as e:   # includes _TaskTimeout
+            errors.append(f'{name}: {e}')
+    return None, None, errors
+
+
+def _numpy_segments(series, periods):
+    """All segment series through one vectorized numpy_forecast_batch call."""
+    keys = list(series)
+    months = series[keys[0]].index
+    _, forecast, sigma, _ = numpy_forecast_batch(np.vstack([series[k].to_numpy() for k in keys]), periods)
+    future = pd.date_range(months.max() + pd.offsets.MonthBegin(1), periods=periods, freq='M')
+    width = INTERVAL_Z * sigma[:, None] * np.sqrt(np.arange(1, periods + 1))
+    return pd.DataFrame({
+        'segment_type': np.repeat([k[0] for k in keys], periods),
+        'segment': np.repeat([k[1] for k in keys], periods),
+        'model': 'numpy',
+        'ds': np.tile(future, len(keys)),
+        'yhat': forecast.ravel(),
+        'yhat_lower': (forecast - width).ravel(),
+        'yhat_upper': (forecast + width).ravel(),
+    })
+
+
+def forecast_segments(df, dims=SEGMENT_DIMS, periods=6, workers=None, timeout=120,
+                      models=('prophet', 'arima', 'numpy')):
+    """Forecast every segment series of df and return one long-format table with columns
+    segment_type, segment, model, ds, yhat, yhat_lower, yhat_upper.
+    - workers: process pool size (None -> os.cpu_count(); 1 -> in-process)
+    - timeout: seconds allowed per model fit before degrading to the next model
+    - models: fallback order; models=('numpy',) fits all series in one vectorized batch
+    """
+    columns = ['segment_type', 'segment', 'model', *FORECAST_COLUMNS]
+    series = segment_series(df, dims)
+    if not series:
+        return pd.DataFrame(columns=columns)
+    if tuple(models) == ('numpy',):
+        return _numpy_segments(series, periods)
+
+    keys = list(series)
+    args = ([series[k] for k in keys], [periods] * len(keys), [timeout] * len(keys),
+            [tuple(models)] * len(keys))
+    if workers == 1:
+        results = list(map(_fit_one, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_one, *args))
+
+    frames = []
+    for (dim, value), (fc, model, errors) in zip(keys, results):
+        if fc is None:
+            print(f'Segment forecast failed for {dim}={value}:', '; '.join(errors))
+            continue
+        frames.append(fc.assign(segment_type=dim, segment=value, model=model))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
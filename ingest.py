@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""ingest.py
+
+Append daily DMS transaction files to the month-partitioned sales store (sales_store.py).
+- Each file is parsed with the canonical schema and appended; rows whose Sale_ID is
+  already stored are skipped, so re-running an ingest is harmless.
+- Only the partitions the new rows fall into are touched. Their monthly totals are
+  updated from the new rows alone.
+- Seed an empty store from the full export once, then ingest the daily deltas:
+    python ingest.py stallion_sales_data.csv
+    python ingest.py dms_2025-11-01.csv dms_2025-11-02.csv
+- Run `python run_pipeline.py --store sales_store` to build the outputs from the store.
+"""
+import argparse
+from pathlib import Path
+
+from sales_schema import read_sales_csv
+from sales_store import STORE_DIR, SalesStore
+
+
+def ingest(paths, store_dir=STORE_DIR):
+    store = SalesStore(store_dir)
+    added = 0
+    for path in paths:
+        df = read_sales_csv(path)
+        new = store.append(df)
+        months = sorted(new['Date'].dt.strftime('%Y-%m').unique()) if len(new) else []
+        print(f'Ingested {len(new)} of {len(df)} rows from {Path(path).name}'
+              + (f' into {len(months)} partition(s) ({months[0]} .. {months[-1]})' if months else ''))
+        added += len(new)
+    print(f'Store {store.root.name}: {store.rows()} rows in {len(store.months())} partitions')
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='+', help='transaction CSVs in the stallion_sales_data.csv layout')
+    parser.add_argument('--store', default=str(STORE_DIR), help='sales store directory')
+    args = parser.parse_args()
+    ingest(args.files, args.store)
@@ -0,0 +1,207 @@
+"""pipeline_dag.py
+
+Minimal stage runner with input-hash caching for run_pipeline.py.
+- A Stage names its upstream stages (deps), the files it writes (outputs), the
+  parameters/config it depends on (params) and an optional source key (e.g. the
+  content digest of an input file).
+- A stage's key hashes its name, params, source key and, per dep, the digests of the
+  files that dep recorded (the dep's own key if it declares no outputs). A rerun that
+  reproduces the same files, or a touched input file, leaves downstream keys unchanged.
+  When the key and the recorded output file hashes match the manifest of the previous
+  run, the stage is skipped and its outputs are reused.
+- Only outputs a stage wrote while it ran (mtime or size changed from a snapshot taken
+  before it started) are recorded, so files left by an earlier run are never reused
+  under a new key.
+- Values of skipped stages are only materialized (via Stage.load, or by re-running an
+  output-less stage) when a stage that does run needs them.
+- With workers > 1 independent stages run at the same time on a process pool, so stage
+  functions and their inputs must be picklable.
+- The module exposes:
+    * Stage                                               -> stage definition
+    * run_stages(stages, manifest_path, force, workers)   -> {name: 'ran' | 'skipped' | 'failed'}
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable                     # func(inputs: {dep name: value}) -> value
+    deps: Tuple[str, ...] = ()
+    outputs: List[Path] = field(default_factory=list)
+    params: Dict = field(default_factory=dict)
+    source_key: Optional[str] = None
+    load: Optional[Callable] = None    # load() -> value rebuilt from outputs when skipped
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def _stage_key(stage, dep_ids):
+    blob = json.dumps({'name': stage.name, 'params': stage.params, 'source': stage.source_key,
+                       'deps': dep_ids}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def _outputs_intact(record):
+    return all(Path(p).exists() and file_digest(p) == d for p, d in record.get('outputs', {}).items())
+
+
+def _read_manifest(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path, manifest):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _snapshot(paths):
+    """(mtime_ns, size) of each path, None when missing."""
+    out = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+            out[str(p)] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            out[str(p)] = None
+    return out
+
+
+class _Run:
+    def __init__(self, stages, manifest_path, force):
+        self.stages = {s.name: s for s in stages}
+        self.manifest_path = manifest_path
+        self.old = {} if force else _read_manifest(manifest_path)
+        self.manifest = {}
+        self.keys = {}
+        self.values = {}
+        self.status = {}
+
+    def dep_id(self, name):
+        """What downstream keys see of a finished stage: its recorded output digests."""
+        if not self.stages[name].outputs:
+            return self.key(name)
+        return self.manifest[name]['outputs']
+
+    def key(self, name):
+        """Stage key; only valid once every dep has run or been skipped."""
+        if name not in self.keys:
+            stage = self.stages[name]
+            self.keys[name] = _stage_key(stage, {d: self.dep_id(d) for d in stage.deps})
+        return self.keys[name]
+
+    def value(self, name):
+        """Value of a stage, materializing skipped upstream stages on demand."""
+        if name not in self.values:
+            stage = self.stages[name]
+            if self.status.get(name) == 'skipped' and stage.load is not None:
+                self.values[name] = stage.load()
+            else:
+                self.values[name] = stage.func({d: self.value(d) for d in stage.deps})
+        return self.values[name]
+
+    def inputs(self, stage):
+        return {d: self.value(d) for d in stage.deps}
+
+    def record(self, stage, before):
+        after = _snapshot(stage.outputs)
+        written = [p for p in stage.outputs if after[str(p)] is not None and after[str(p)] != before[str(p)]]
+        self.manifest[stage.name] = {'key': self.key(stage.name),
+                                     'outputs': {str(p): file_digest(p) for p in written}}
+
+    def order(self):
+        seen, out = set(), []
+        def visit(name):
+            if name not in seen:
+                seen.add(name)
+                for d in self.stages[name].deps:
+                    visit(d)
+                out.append(name)
+        for name in self.stages:
+            visit(name)
+        return out
+
+    def should_skip(self, name):
+        prev = self.old.get(name)
+        return bool(prev) and prev.get('key') == self.key(name) and _outputs_intact(prev)
+
+
+def run_stages(stages, manifest_path, force=False, workers=1):
+    """Run stages in dependency order, skipping those whose inputs are unchanged.
+
+    With workers > 1, stages whose dependencies are done run concurrently on a process
+    pool; a failing stage only stops the stages downstream of it.
+    """
+    run = _Run(stages, manifest_path, force)
+    pending = run.order()
+    running = {}   # future -> (stage name, output snapshot)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def finish(name, call, before):
+        try:
+            run.values[name] = call()
+        except Exception as e:
+            run.status[name] = 'failed'
+            print(f'[{name}] failed:', e)
+            return
+        run.status[name] = 'ran'
+        run.record(run.stages[name], before)
+
+    try:
+        while pending or running:
+            for name in list(pending):
+                stage = run.stages[name]
+                if any(run.status.get(d) == 'failed' for d in stage.deps):
+                    pending.remove(name)
+                    run.status[name] = 'failed'
+                    print(f'[{name}] not run: upstream stage failed')
+                    continue
+                if any(run.status.get(d) not in ('ran', 'skipped') for d in stage.deps):
+                    continue   # an upstream stage is still pending or running
+                pending.remove(name)
+                if run.should_skip(name):
+                    run.status[name] = 'skipped'
+                    run.manifest[name] = run.old[name]
+                    print(f'[{name}] unchanged, reusing outputs')
+                    continue
+                before = _snapshot(stage.outputs)
+                if pool is None:
+                    finish(name, lambda: stage.func(run.inputs(stage)), before)
+                    continue
+                try:
+                    inputs = run.inputs(stage)
+                except Exception as e:
+                    run.status[name] = 'failed'
+                    print(f'[{name}] failed preparing inputs:', e)
+                    continue
+                run.status[name] = 'running'
+                running[pool.submit(stage.func, inputs)] = (name, before)
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name, before = running.pop(fut)
+                    finish(name, fut.result, before)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    _write_manifest(manifest_path, run.manifest)
+    return run.status
@@ -0,0 +1,174 @@
+"""pipeline_metrics.py
+
+Per-stage timing and memory records for run_pipeline.py.
+- stage_metrics(name, rows_in, outputs) wraps one unit of work (monthly aggregates,
+  leaderboard, each forecast attempt, ...). It records wall and CPU seconds, peak RSS,
+  rows in/out, the bytes of the files written and whether the work raised.
+- Every record is appended to a JSON-lines log as soon as the work ends, tagged with the
+  run id, so records from stages running in worker processes land in the same log.
+- Peak RSS is per stage on Linux (the kernel high-water mark is reset when the stage
+  starts); elsewhere it is the process high-water mark (rss_scope says which).
+- After a run, write_prometheus() turns the run's records into a node_exporter textfile.
+- Both the log path and the run id are passed to worker processes through environment
+  variables, so they also reach stages on a spawn-based process pool.
+- The module exposes:
+    * start_run(log_path)                        -> run id; enables recording in this and child processes
+    * stage_metrics(stage, rows_in, outputs)     -> context manager yielding the record (set 'rows_out')
+    * finish_run(status, wall_seconds)           -> appends the run summary line, returns the run's records
+    * run_records(log_path, run_id)              -> records of one run read back from the log
+    * write_prometheus(records, path)            -> Prometheus textfile with one sample per stage and metric
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import uuid
+
+LOG_ENV = 'STALLION_METRICS_LOG'
+RUN_ENV = 'STALLION_METRICS_RUN'
+
+PROMETHEUS_METRICS = [
+    ('wall_seconds', 'Wall-clock seconds of the stage'),
+    ('cpu_seconds', 'CPU seconds (user + system) of the stage process'),
+    ('peak_rss_bytes', 'Peak resident set size while the stage ran'),
+    ('rows_in', 'Rows the stage read'),
+    ('rows_out', 'Rows the stage produced'),
+    ('output_bytes', 'Bytes of the files the stage wrote'),
+    ('success', '1 if the stage finished, 0 if it raised'),
+]
+
+
+def start_run(log_path):
+    run_id = f'{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:6]}'
+    os.environ[LOG_ENV] = str(log_path)
+    os.environ[RUN_ENV] = run_id
+    return run_id
+
+
+def _append(record):
+    path = os.environ.get(LOG_ENV)
+    if not path:
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # One write per line on an O_APPEND file, so concurrent stages do not interleave
+    with open(path, 'a') as fh:
+        fh.write(json.dumps(record, default=str) + '\n')
+
+
+def _reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_bytes(per_stage):
+    if per_stage:
+        try:
+            with open('/proc/self/status') as fh:
+                for line in fh:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def stage_metrics(stage, rows_in=None, outputs=()):
+    """Measure the enclosed block; set record['rows_out'] inside it.
+    Exceptions propagate after the failed record is written."""
+    record = {'run_id': os.environ.get(RUN_ENV), 'stage': stage, 'rows_in': rows_in, 'rows_out': None}
+    per_stage = _reset_peak_rss()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+        record['status'] = 'ok'
+    except BaseException as e:
+        record['status'] = 'failed'
+        record['error'] = str(e)
+        raise
+    finally:
+        written = [Path(p) for p in outputs if Path(p).exists()]
+        record.update(
+            wall_seconds=round(time.perf_counter() - wall, 4),
+            cpu_seconds=round(time.process_time() - cpu, 4),
+            peak_rss_bytes=_peak_rss_bytes(per_stage),
+            rss_scope='stage' if per_stage else 'process',
+            output_bytes=sum(p.stat().st_size for p in written),
+            pid=os.getpid(),
+            finished=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        )
+        _append(record)
+        rss = record['peak_rss_bytes']
+        peak = f'{rss / 2**20:.0f} MB' if rss else 'n/a'
+        print(f'[metrics] {stage}: {record["status"]}, {record["wall_seconds"]:.2f}s wall, '
+              f'{record["cpu_seconds"]:.2f}s cpu, peak {peak}, rows {rows_in} -> {record["rows_out"]}')
+
+
+def run_records(log_path, run_id):
+    records = []
+    try:
+        with open(log_path) as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue   # a line cut short by a crash
+                if record.get('run_id') == run_id:
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+
+def finish_run(status, wall_seconds):
+    """Append the run summary ({stage: 'ran' | 'skipped' | 'failed'}) and return every
+    record of this run, summary last."""
+    run_id, path = os.environ.get(RUN_ENV), os.environ.get(LOG_ENV)
+    _append({'run_id': run_id, 'stage': 'run', 'status': status, 'wall_seconds': round(wall_seconds, 4),
+             'finished': datetime.now(timezone.utc).isoformat(timespec='seconds')})
+    return run_records(path, run_id) if path else []
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_prometheus(records, path, prefix='stallion_pipeline'):
+    """Write records as a node_exporter textfile (replaced atomically)."""
+    # Last record per stage: a textfile must not repeat a series
+    stages = list({r['stage']: r for r in records if r['stage'] != 'run'}.values())
+    lines = []
+    for metric, help_text in PROMETHEUS_METRICS:
+        name = f'{prefix}_stage_{metric}'
+        lines += [f'# HELP {name} {help_text}.', f'# TYPE {name} gauge']
+        for r in stages:
+            value = int(r['status'] == 'ok') if metric == 'success' else r.get(metric)
+            if value is not None:
+                lines.append(f'{name}{{stage="{_label(r["stage"])}"}} {value}')
+    summary = next((r for r in records if r['stage'] == 'run'), None)
+    if summary is not None:
+        lines += [f'# HELP {prefix}_run_wall_seconds Wall-clock seconds of the whole run.',
+                  f'# TYPE {prefix}_run_wall_seconds gauge',
+                  f'{prefix}_run_wall_seconds {summary["wall_seconds"]}',
+                  f'# HELP {prefix}_last_run_timestamp_seconds Unix time the run finished.',
+                  f'# TYPE {prefix}_last_run_timestamp_seconds gauge',
+                  f'{prefix}_last_run_timestamp_seconds {time.time():.0f}']
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text('\n'.join(lines) + '\n')
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,80 @@
+"""raw_explorer.py
+
+Paginated browsing of the filtered transactions for the dashboard's raw-data view.
+- The filtered rows are never copied: a selection is a row slice or position array into
+  the shared, Date-sorted FilterIndex frame (FilterIndex.row_positions).
+- Search keeps the positions whose text columns contain the query (case-insensitive). A
+  categorical column is matched on its small dictionary, then compared by integer code.
+- Sort orders the positions by one column (stable, so ties stay Date-sorted), reading only
+  that column for the selected rows.
+- A page is frame.iloc[...] of at most page-size positions; only those rows are built and
+  sent to the browser. Without search or sort the order stays a slice.
+- The module exposes:
+    * SEARCH_COLUMNS / SORT_COLUMNS / PAGE_SIZES                -> explorer options
+    * row_order(frame, positions, search, sort, descending)     -> slice or positions in display order
+    * order_length(order)                                       -> rows in the order
+    * page_rows(frame, order, page, page_size)                  -> rows of one page (0-based page)
+"""
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLUMNS = ('Sale_ID', 'Vehicle_Model', 'Vehicle_Type', 'Region', 'Dealer_Branch', 'Salesperson',
+                  'Payment_Method', 'Customer_Type')
+SORT_COLUMNS = ('Date', 'Sale_ID', 'Vehicle_Model', 'Vehicle_Type', 'Price', 'Cost', 'Profit', 'Region',
+                'Dealer_Branch', 'Salesperson', 'Customer_Age', 'Customer_Gender', 'Payment_Method',
+                'Customer_Type', 'Quantity')
+PAGE_SIZES = (50, 100, 200, 500)
+
+
+def _as_array(positions, n):
+    if isinstance(positions, slice):
+        return np.arange(*positions.indices(n))
+    return np.asarray(positions)
+
+
+def _search_mask(frame, positions, text, columns):
+    text = text.lower()
+    mask = np.zeros(len(positions), dtype=bool)
+    for col in columns:
+        if col not in frame.columns:
+            continue
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            hits = [i for i, label in enumerate(values.cat.categories) if text in str(label).lower()]
+            if hits:
+                mask |= np.isin(values.cat.codes.to_numpy()[positions], hits)
+        else:
+            picked = values.iloc[positions]
+            if picked.dtype != object:
+                picked = picked.astype(str)
+            mask |= picked.str.contains(text, case=False, regex=False, na=False).to_numpy()
+    return mask
+
+
+def row_order(frame, positions, search=None, sort=None, descending=False, columns=SEARCH_COLUMNS):
+    """Rows of frame at positions (slice or ascending array) matching search, ordered by sort."""
+    if not search and sort is None:
+        return positions
+    order = _as_array(positions, len(frame))
+    if search:
+        order = order[_search_mask(frame, order, search, columns)]
+    if sort is not None:
+        keys = frame[sort].iloc[order].reset_index(drop=True)
+        ranked = keys.sort_values(ascending=not descending, kind='stable', na_position='last')
+        order = order[ranked.index.to_numpy()]
+    return order
+
+
+def order_length(order):
+    if isinstance(order, slice):
+        return max(0, order.stop - order.start)
+    return len(order)
+
+
+def page_rows(frame, order, page, page_size):
+    lo = page * page_size
+    if isinstance(order, slice):
+        start = order.start + lo
+        return frame.iloc[start:min(start + page_size, order.stop)]
+    return frame.iloc[order[lo:lo + page_size]]
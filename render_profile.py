@@ -0,0 +1,101 @@
+"""render_profile.py
+
+Opt-in render-time profiling for the Streamlit dashboard.
+- RenderProfile.section(name) times one section of a script run (load, filter, KPIs, each
+  chart, raw table, forecast read). A section entered twice in one run adds up. When
+  profiling is off, sections cost one attribute check.
+- Each chart is split into '<chart>.build' (Plotly figure) and '<chart>.send'
+  (st.plotly_chart, where the figure is serialized), to separate the two costs.
+- Time not spent in any section (Streamlit widgets, imports on first run) is reported as
+  'other'.
+- The timings of every rerun are kept in a bounded per-session history. show_panel()
+  draws this rerun's breakdown, a histogram of the last reruns and CSV/JSON downloads.
+- The module exposes:
+    * new_history()                       -> empty bounded rerun history (keep it in session state)
+    * RenderProfile(enabled)              -> timer for one script run
+    * RenderProfile.section(name)         -> context manager timing one section
+    * RenderProfile.record(history)       -> appends this run's timings to history, returns them
+    * history_frame(history)              -> long table (rerun, time, section, ms)
+    * show_panel(profile, history, stats) -> Streamlit debug panel
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import time
+
+import pandas as pd
+
+HISTORY_SIZE = 200   # reruns kept per session
+
+
+def new_history():
+    return deque(maxlen=HISTORY_SIZE)
+
+
+class RenderProfile:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t0
+
+    def record(self, history):
+        total = time.perf_counter() - self.started
+        run = {'rerun': history[-1]['rerun'] + 1 if history else 1,
+               'time': datetime.now().isoformat(timespec='milliseconds'),
+               'sections': {**self.timings, 'other': max(0.0, total - sum(self.timings.values()))},
+               'total': total}
+        history.append(run)
+        return run
+
+
+def history_frame(history):
+    rows = [{'rerun': run['rerun'], 'time': run['time'], 'section': name, 'ms': seconds * 1000}
+            for run in history for name, seconds in [*run['sections'].items(), ('total', run['total'])]]
+    return pd.DataFrame(rows, columns=['rerun', 'time', 'section', 'ms'])
+
+
+def show_panel(profile, history, stats=None):
+    """Record this rerun and draw the panel; call it last so every section is included.
+    stats: optional {name: {counter: value}} shown below the timings (e.g. cache hit rates)."""
+    import plotly.express as px
+    import streamlit as st
+
+    run = profile.record(history)
+    with st.expander(f"Render profile: {run['total'] * 1000:,.0f} ms this rerun", expanded=True):
+        breakdown = pd.DataFrame({'section': list(run['sections']),
+                                  'ms': [s * 1000 for s in run['sections'].values()]})
+        breakdown['share'] = breakdown['ms'] / max(run['total'] * 1000, 1e-9)
+        st.dataframe(breakdown.sort_values('ms', ascending=False).style.format({'ms': '{:,.1f}',
+                                                                                 'share': '{:.0%}'}),
+                     hide_index=True)
+
+        frame = history_frame(history)
+        spread = (frame.groupby('section', sort=False)['ms']
+                       .describe(percentiles=[0.5, 0.95])[['count', 'mean', '50%', '95%', 'max']])
+        st.caption(f'Last {len(history)} reruns of this session (ms)')
+        st.dataframe(spread.round(1))
+        sections = frame[frame['section'] != 'total']
+        fig = px.histogram(sections, x='ms', color='section', barmode='overlay', nbins=40,
+                           title='Section time across reruns')
+        st.plotly_chart(fig, use_container_width=True)
+        if stats:
+            st.dataframe(pd.DataFrame(stats).T)
+
+        col1, col2 = st.columns(2)
+        col1.download_button('Download timings (CSV)', frame.to_csv(index=False),
+                             file_name='render_profile.csv', mime='text/csv')
+        col2.download_button('Download timings (JSON)', json.dumps(list(history), indent=2),
+                             file_name='render_profile.json', mime='application/json')
@@ -0,0 +1,104 @@
+"""result_cache.py
+
+Bounded LRU of dashboard results, keyed on the normalized filter selection.
+- filter_key() normalizes a selection: dates to whole days, clamped to the data's date
+  bounds (rows outside them do not exist, so wider ranges give the same result), and
+  filters to sorted (dim, value) pairs with 'All' (None) dropped. The data version is part
+  of the key, so new data never hits an old entry.
+- Entries hold the filtered KPIs and chart-ready frames (the summarize() dict); a repeat
+  selection renders its KPIs and charts from them without touching raw rows.
+- The cache is capped by entry count and by estimated memory (deep DataFrame memory,
+  array bytes).
+  Least recently used entries are evicted first; an entry over the memory cap alone is
+  not stored.
+- Thread-safe, so one cache can be shared by every dashboard session.
+- The module exposes:
+    * filter_key(version, start, end, filters, bounds)   -> hashable cache key
+    * ResultCache(max_entries, max_bytes)                 -> LRU
+    * ResultCache.get(key) / put(key, value)              -> value or None / stored?
+    * ResultCache.stats()                                 -> hits, misses, evictions, entries, bytes
+    * estimate_bytes(value)                               -> memory estimate of a cached value
+"""
+
+from collections import OrderedDict
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+MAX_ENTRIES = 64
+MAX_BYTES = 64 * 2**20
+
+
+def filter_key(version, start, end, filters, bounds=None):
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    if bounds is not None:
+        lo, hi = (pd.Timestamp(b).normalize() for b in bounds)
+        start, end = max(start, lo), min(end, hi)
+    active = tuple(sorted((dim, value) for dim, value in (filters or {}).items() if value is not None))
+    return (version, start, end, active)
+
+
+def estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store value (treated as read-only from now on); False if it exceeds max_bytes."""
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else None,
+                    'evictions': self.evictions, 'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_entries': self.max_entries, 'max_bytes': self.max_bytes}
@@ -1,23 +1,368 @@
-
 #!/usr/bin/env python3
-\"\"\"run_pipeline.py
+"""run_pipeline.py
 
 Automatic monthly pipeline script:
 - regenerates monthly aggregates (stallion_monthly_agg.csv)
 - computes salesperson leaderboard and saves CSV
 - attempts to run Prophet (recommended) to create 6-month forecast CSV ('stallion_prophet_forecast.csv')
 - if Prophet not available, tries pmdarima ARIMA fallback to produce 'stallion_arima_forecast.csv'
+- if neither is available, writes a NumPy Holt-Winters forecast ('stallion_numpy_forecast.csv',
+  same columns as the Prophet file); --forecaster picks one model explicitly
+- runs as stages (load -> monthly_agg -> leaderboard, monthly_agg -> forecast); a stage whose
+  inputs and config are unchanged since the last run is skipped and its CSVs are reused
+  (see pipeline_dag.py; pass --force to rerun everything)
+- Prophet/ARIMA fits are saved next to their CSVs ('stallion_prophet_forecast.json',
+  'stallion_arima_forecast.json') and warm-start the next run; a full refit (and ARIMA order
+  search) only runs when the data drifts past --drift_threshold, or with --refit
+- with --store DIR, reads the month-partitioned store filled by ingest.py instead of one
+  CSV; the monthly aggregates come from the totals the store updates on each ingest
+- with --chunksize N, streams --sales_csv N rows at a time for files larger than memory:
+  monthly totals and per-salesperson-month commission partials are accumulated chunk by
+  chunk, and the CSVs come out identical to the in-memory run
+- appends wall/CPU time, peak RSS, rows in/out and output bytes of every stage and forecast
+  attempt to pipeline_metrics.jsonl (--metrics_log), and with --prometheus_textfile PATH
+  also writes them as a Prometheus textfile (see pipeline_metrics.py)
+- with --workers N, independent stages (leaderboard and forecast) run in parallel processes
+- with --segments, also writes 6-month forecasts per Region, Dealer_Branch and Vehicle_Model
+  ('stallion_segment_forecast.csv', long format), fitted across a process pool
 
 Usage:
     python run_pipeline.py --sales_csv stallion_sales_data.csv
 
 This script is safe to run on a schedule (cron, GitHub Actions, etc.).
-\"\"\"
+"""
 import argparse, sys
+import importlib.util
+from functools import partial
+import time
 import pandas as pd
 from pathlib import Path
 
+from pipeline_dag import Stage, run_stages
+from pipeline_metrics import finish_run, stage_metrics, start_run, write_prometheus
+from sales_data import csv_digest
+from sales_schema import read_sales_csv
+
 PROJ = Path(__file__).resolve().parent
+METRICS_LOG = PROJ / 'pipeline_metrics.jsonl'
+
+def monthly_aggregates(df):
+    monthly = df.groupby(pd.Grouper(key='Date', freq='M')).agg(
+        Revenue=('Price','sum'),
+        Units=('Quantity','sum'),
+        Profit=('Profit','sum')
+    ).reset_index()
+    return monthly.rename(columns={'Date':'ds'})
 
 def regenerate_monthly_agg(df):
-    monthly = df.groupby(pd.Grouper(key='Date', freq='M')).agg(\n        Revenue=('Price','sum'),\n        Units=('Quantity','sum'),\n        Profit=('Profit','sum')\n    ).reset_index()\n    monthly = monthly.rename(columns={'Date':'ds'})\n    monthly.to_csv(PROJ / 'stallion_monthly_agg.csv', index=False)\n    print('Saved stallion_monthly_agg.csv')\n    return monthly\n\ndef create_leaderboard(df):\n    # Lazy import to avoid dependency if user only wants basic pipeline\n    from commission_calc import compute_leaderboard\n    leaderboard = compute_leaderboard(df)\n    leaderboard.to_csv(PROJ / 'salesperson_leaderboard_monthly.csv', index=False)\n    print('Saved salesperson_leaderboard_monthly.csv')\n    return leaderboard\n\n\ndef try_prophet_forecast(monthly_df, periods=6):\n    try:\n        from prophet import Prophet\n        m = Prophet(yearly_seasonality=True, weekly_seasonality=False, daily_seasonality=False)\n        dfp = monthly_df[['ds','Revenue']].rename(columns={'ds':'ds','Revenue':'y'})\n        dfp['ds'] = pd.to_datetime(dfp['ds'])\n        m.fit(dfp)\n        future = m.make_future_dataframe(periods=periods, freq='M')\n        forecast = m.predict(future)\n        forecast[['ds','yhat','yhat_lower','yhat_upper']].to_csv(PROJ / 'stallion_prophet_forecast.csv', index=False)\n        print('Saved stallion_prophet_forecast.csv (Prophet)')\n        return True\n    except Exception as e:\n        print('Prophet forecasting failed or not installed:', e)\n        return False\n\n\ndef try_arima_forecast(monthly_df, periods=6):\n    try:\n        import pmdarima as pm\n        series = monthly_df.set_index('ds')['Revenue']\n        series.index = pd.to_datetime(series.index)\n        model = pm.auto_arima(series, seasonal=True, m=12, error_action='ignore', suppress_warnings=True)\n        fc = model.predict(n_periods=periods)\n        last_date = series.index.max()\n        future_index = pd.date_range(last_date + pd.offsets.MonthBegin(1), periods=periods, freq='M')\n        arima_df = pd.DataFrame({'ds': future_index, 'yhat': fc})\n        arima_df.to_csv(PROJ / 'stallion_arima_forecast.csv', index=False)\n        print('Saved stallion_arima_forecast.csv (ARIMA)')\n        return True\n    except Exception as e:\n        print('ARIMA forecasting failed or not installed:', e)\n        return False\n\n\ndef main(sales_csv):\n    df = pd.read_csv(sales_csv, parse_dates=['Date'])\n    # regenerate monthly aggregates\n    monthly = regenerate_monthly_agg(df)\n    # create leaderboard\n    create_leaderboard(df)\n    # try prophet\n    ok = try_prophet_forecast(monthly)\n    if not ok:\n        # fallback to ARIMA\n        try_arima_forecast(monthly)\n\nif __name__ == '__main__':\n    parser = argparse.ArgumentParser()\n    parser.add_argument('--sales_csv', default=str(PROJ / 'stallion_sales_data.csv'))\n    args = parser.parse_args()\n    main(args.sales_csv)\n
\ No newline at end of file
+    with stage_metrics('monthly_agg', rows_in=len(df), outputs=[PROJ / 'stallion_monthly_agg.csv']) as m:
+        monthly = save_monthly_agg(monthly_aggregates(df))
+        m['rows_out'] = len(monthly)
+    return monthly
+
+def stream_sales(sales_csv, chunksize, config=None):
+    """Monthly aggregates and leaderboard partials from one chunked pass over sales_csv.
+    Memory is bounded by the chunk plus one row per month / salesperson-month."""
+    from commission_calc import SaleLevelAccumulator
+    acc = SaleLevelAccumulator(config)
+    monthly, rows = None, 0
+    for chunk in read_sales_csv(sales_csv, chunksize=chunksize):
+        rows += len(chunk)
+        acc.add(chunk)
+        part = chunk.groupby(chunk['Date'].dt.to_period('M')).agg(
+            Revenue=('Price','sum'), Units=('Quantity','sum'), Profit=('Profit','sum'))
+        monthly = part if monthly is None else pd.concat([monthly, part]).groupby(level=0).sum()
+    if monthly is None or monthly.empty:
+        # Header-only CSV: empty table, as regenerate_monthly_agg writes for the same file
+        empty = pd.DataFrame({'ds': pd.Series(dtype='datetime64[ns]'),
+                              **{col: pd.Series(dtype='int64') for col in ('Revenue', 'Units', 'Profit')}})
+        return {'monthly': empty, 'leaderboard': acc, 'rows': rows}
+    # Same layout as regenerate_monthly_agg: month-end ds, months without sales as zeros
+    monthly.index = monthly.index.to_timestamp(how='end').normalize()
+    months = pd.date_range(monthly.index.min(), monthly.index.max(), freq='M', name='ds')
+    return {'monthly': monthly.reindex(months, fill_value=0).reset_index(), 'leaderboard': acc, 'rows': rows}
+
+def save_monthly_agg(monthly):
+    monthly.to_csv(PROJ / 'stallion_monthly_agg.csv', index=False)
+    print('Saved stallion_monthly_agg.csv')
+    return monthly
+
+def create_leaderboard(df, incremental=False, version=None):
+    """version identifies the data (e.g. the CSV digest): sale-level partials saved
+    under .cache/sale_level for it are reused when only the monthly bonus config changed."""
+    # Lazy import to avoid dependency if user only wants basic pipeline
+    from commission_calc import compute_leaderboard, compute_leaderboard_incremental
+    output = PROJ / 'salesperson_leaderboard_monthly.csv'
+    with stage_metrics('leaderboard', rows_in=len(df), outputs=[output]) as m:
+        if incremental:
+            # Reuses per-salesperson-month partials from the previous run for unchanged months
+            leaderboard = compute_leaderboard_incremental(df, PROJ / '.cache' / 'leaderboard_state.pkl')
+        else:
+            leaderboard = compute_leaderboard(df, version=version, cache_dir=PROJ / '.cache' / 'sale_level')
+        leaderboard.to_csv(output, index=False)
+        m['rows_out'] = len(leaderboard)
+    print('Saved salesperson_leaderboard_monthly.csv')
+    return leaderboard
+
+
+def _revenue_series(monthly_df):
+    series = monthly_df.set_index('ds')['Revenue']
+    series.index = pd.to_datetime(series.index)
+    return series
+
+
+def try_prophet_forecast(monthly_df, periods=6, refit=False, drift_threshold=None):
+    output = PROJ / 'stallion_prophet_forecast.csv'
+    try:
+        with stage_metrics('forecast.prophet', rows_in=len(monthly_df), outputs=[output]) as m:
+            from forecasting import DRIFT_THRESHOLD, warm_forecast
+            # Parameters saved next to the CSV warm-start the next run's fit
+            forecast, full = warm_forecast('prophet', _revenue_series(monthly_df), periods,
+                                           PROJ / 'stallion_prophet_forecast.json',
+                                           DRIFT_THRESHOLD if drift_threshold is None else drift_threshold, refit)
+            forecast.to_csv(output, index=False)
+            m.update(rows_out=len(forecast), full_fit=full)
+        print(f'Saved stallion_prophet_forecast.csv (Prophet, {"full fit" if full else "warm start"})')
+        return True
+    except Exception as e:
+        print('Prophet forecasting failed or not installed:', e)
+        return False
+
+
+def try_arima_forecast(monthly_df, periods=6, refit=False, drift_threshold=None):
+    output = PROJ / 'stallion_arima_forecast.csv'
+    try:
+        with stage_metrics('forecast.arima', rows_in=len(monthly_df), outputs=[output]) as m:
+            from forecasting import DRIFT_THRESHOLD, warm_forecast
+            # The saved order skips the auto_arima search until the series drifts
+            arima_df, full = warm_forecast('arima', _revenue_series(monthly_df), periods,
+                                           PROJ / 'stallion_arima_forecast.json',
+                                           DRIFT_THRESHOLD if drift_threshold is None else drift_threshold, refit)
+            arima_df[['ds', 'yhat']].to_csv(output, index=False)
+            m.update(rows_out=len(arima_df), full_fit=full)
+        print(f'Saved stallion_arima_forecast.csv (ARIMA, {"order search" if full else "saved order"})')
+        return True
+    except Exception as e:
+        print('ARIMA forecasting failed or not installed:', e)
+        return False
+
+
+def try_numpy_forecast(monthly_df, periods=6):
+    # Dependency-free Holt-Winters; fast enough to always run as the last fallback
+    output = PROJ / 'stallion_numpy_forecast.csv'
+    try:
+        with stage_metrics('forecast.numpy', rows_in=len(monthly_df), outputs=[output]) as m:
+            from forecasting import numpy_forecast
+            forecast = numpy_forecast(_revenue_series(monthly_df), periods)
+            forecast.to_csv(output, index=False)
+            m['rows_out'] = len(forecast)
+        print('Saved stallion_numpy_forecast.csv (NumPy Holt-Winters)')
+        return True
+    except Exception as e:
+        print('NumPy forecasting failed:', e)
+        return False
+
+
+def create_segment_forecast(df, periods=6, workers=None, timeout=120, models=('prophet', 'arima', 'numpy')):
+    from forecasting import forecast_segments
+    output = PROJ / 'stallion_segment_forecast.csv'
+    with stage_metrics('segment_forecast', rows_in=len(df), outputs=[output]) as m:
+        table = forecast_segments(df, periods=periods, workers=workers, timeout=timeout, models=models)
+        table.to_csv(output, index=False)
+        m['rows_out'] = len(table)
+    print(f'Saved stallion_segment_forecast.csv ({table.groupby(["segment_type", "segment"]).ngroups} series)')
+    return table
+
+
+FORECASTERS = {'prophet': try_prophet_forecast, 'arima': try_arima_forecast, 'numpy': try_numpy_forecast}
+FORECAST_ORDER = ('prophet', 'arima', 'numpy')
+WARM_FORECASTERS = ('prophet', 'arima')
+
+
+def run_forecasts(monthly_df, forecaster='auto', refit=False, drift_threshold=None):
+    """Run one forecaster, or with 'auto' Prophet -> ARIMA -> NumPy until one succeeds."""
+    order = FORECAST_ORDER if forecaster == 'auto' else (forecaster,)
+    for name in order:
+        warm = {'refit': refit, 'drift_threshold': drift_threshold} if name in WARM_FORECASTERS else {}
+        if FORECASTERS[name](monthly_df, **warm):
+            return name
+    return None
+
+
+def _available_forecasters():
+    # Part of the forecast stage key, so installing Prophet/pmdarima triggers a rerun
+    return [m for m in ('prophet', 'pmdarima') if importlib.util.find_spec(m) is not None]
+
+
+# Stage bodies are module-level functions (not lambdas) so stages stay picklable
+def _load_stage(inputs, sales_csv):
+    with stage_metrics('load') as m:
+        df = read_sales_csv(sales_csv)
+        m['rows_out'] = len(df)
+    return df
+
+def _stream_stage(inputs, sales_csv, chunksize):
+    with stage_metrics('load') as m:
+        streamed = stream_sales(sales_csv, chunksize)
+        m['rows_out'] = streamed['rows']
+    return streamed
+
+def _save_monthly_stage(monthly, rows_in=None):
+    with stage_metrics('monthly_agg', rows_in=rows_in, outputs=[PROJ / 'stallion_monthly_agg.csv']) as m:
+        save_monthly_agg(monthly)
+        m['rows_out'] = len(monthly)
+    return monthly
+
+def _stream_monthly_agg_stage(inputs):
+    return _save_monthly_stage(inputs['load']['monthly'], inputs['load']['rows'])
+
+def _monthly_agg_stage(inputs):
+    return regenerate_monthly_agg(inputs['load'])
+
+def _load_store_stage(inputs, store_dir):
+    from sales_store import SalesStore
+    with stage_metrics('load') as m:
+        df = SalesStore(store_dir).read()
+        m['rows_out'] = len(df)
+    return df
+
+def _store_monthly_agg_stage(inputs, store_dir):
+    # Totals the store keeps up to date on ingest; no pass over the transactions
+    from sales_store import SalesStore
+    return _save_monthly_stage(SalesStore(store_dir).monthly_agg())
+
+def _read_monthly_agg():
+    return pd.read_csv(PROJ / 'stallion_monthly_agg.csv', parse_dates=['ds'])
+
+def _leaderboard_stage(inputs, incremental=False, version=None):
+    return create_leaderboard(inputs['load'], incremental=incremental, version=version)
+
+def _stream_leaderboard_stage(inputs):
+    output = PROJ / 'salesperson_leaderboard_monthly.csv'
+    with stage_metrics('leaderboard', rows_in=inputs['load']['rows'], outputs=[output]) as m:
+        leaderboard = inputs['load']['leaderboard'].leaderboard()
+        leaderboard.to_csv(output, index=False)
+        m['rows_out'] = len(leaderboard)
+    print('Saved salesperson_leaderboard_monthly.csv')
+    return leaderboard
+
+def _forecast_stage(inputs, forecaster='auto', refit=False, drift_threshold=None):
+    used = run_forecasts(inputs['monthly_agg'], forecaster, refit=refit, drift_threshold=drift_threshold)
+    if used is None:
+        # Fail the stage so forecast CSVs left from older data are not recorded for this input
+        raise RuntimeError(f'no forecaster succeeded ({forecaster})')
+    return used
+
+def _segment_forecast_stage(inputs, workers=None, forecaster='auto'):
+    models = FORECAST_ORDER if forecaster == 'auto' else (forecaster,)
+    return create_segment_forecast(inputs['load'], workers=workers, models=models)
+
+
+def _source_version(sales_csv, store_dir=None):
+    if store_dir is None:
+        return csv_digest(sales_csv)
+    from sales_store import SalesStore
+    return SalesStore(store_dir).version()
+
+
+def _source_stages(sales_csv, version, store_dir=None, chunksize=None):
+    """load and monthly_agg stages, from the CSV (whole or chunked) or from the sales store."""
+    if chunksize:
+        # 'load' is the accumulators of one chunked pass, not the transactions
+        return [
+            Stage('load', partial(_stream_stage, sales_csv=sales_csv, chunksize=chunksize),
+                  source_key=version, params={'stream': True}),
+            Stage('monthly_agg', _stream_monthly_agg_stage, deps=('load',),
+                  outputs=[PROJ / 'stallion_monthly_agg.csv'], load=_read_monthly_agg),
+        ]
+    if store_dir is None:
+        return [
+            Stage('load', partial(_load_stage, sales_csv=sales_csv), source_key=version),
+            Stage('monthly_agg', _monthly_agg_stage, deps=('load',),
+                  outputs=[PROJ / 'stallion_monthly_agg.csv'], load=_read_monthly_agg),
+        ]
+    return [
+        Stage('load', partial(_load_store_stage, store_dir=store_dir), source_key=version),
+        Stage('monthly_agg', partial(_store_monthly_agg_stage, store_dir=store_dir), source_key=version,
+              outputs=[PROJ / 'stallion_monthly_agg.csv'], load=_read_monthly_agg),
+    ]
+
+
+def build_stages(sales_csv, incremental=False, segments=False, segment_workers=None, forecaster='auto',
+                 refit=False, drift_threshold=None, store_dir=None, chunksize=None):
+    from commission_calc import DEFAULT_CONFIG
+    version = _source_version(sales_csv, store_dir)
+    leaderboard = (_stream_leaderboard_stage if chunksize
+                   else partial(_leaderboard_stage, incremental=incremental, version=version))
+    stages = _source_stages(sales_csv, version, store_dir, chunksize) + [
+        Stage('leaderboard', leaderboard, deps=('load',),
+              outputs=[PROJ / 'salesperson_leaderboard_monthly.csv'],
+              params={'config': DEFAULT_CONFIG}),
+        Stage('forecast', partial(_forecast_stage, forecaster=forecaster, refit=refit,
+                                  drift_threshold=drift_threshold), deps=('monthly_agg',),
+              outputs=[PROJ / 'stallion_prophet_forecast.csv', PROJ / 'stallion_arima_forecast.csv',
+                       PROJ / 'stallion_numpy_forecast.csv'],
+              params={'periods': 6, 'forecaster': forecaster, 'refit': refit,
+                      'drift_threshold': drift_threshold, 'forecasters': _available_forecasters()}),
+    ]
+    if segments:
+        stages.append(Stage('segment_forecast',
+                            partial(_segment_forecast_stage, workers=segment_workers, forecaster=forecaster),
+                            deps=('load',), outputs=[PROJ / 'stallion_segment_forecast.csv'],
+                            params={'periods': 6, 'forecaster': forecaster,
+                                    'forecasters': _available_forecasters()}))
+    return stages
+
+
+def main(sales_csv, incremental=False, force=False, workers=1, segments=False, segment_workers=None,
+         forecaster='auto', refit=False, drift_threshold=None, store_dir=None, chunksize=None,
+         metrics_log=METRICS_LOG, prometheus_textfile=None):
+    stages = build_stages(sales_csv, incremental=incremental, segments=segments,
+                          segment_workers=segment_workers, forecaster=forecaster,
+                          refit=refit, drift_threshold=drift_threshold, store_dir=store_dir,
+                          chunksize=chunksize)
+    # Set before the stage pool starts so worker processes log to the same run
+    run_id = start_run(metrics_log)
+    started = time.perf_counter()
+    status = run_stages(stages, PROJ / '.cache' / 'pipeline_manifest.json', force=force, workers=workers)
+    records = finish_run(status, time.perf_counter() - started)
+    print(f'Run {run_id}: {len(records) - 1} stage records appended to {metrics_log}')
+    if prometheus_textfile:
+        print('Saved', write_prometheus(records, prometheus_textfile))
+    return status
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sales_csv', default=str(PROJ / 'stallion_sales_data.csv'))
+    parser.add_argument('--store', default=None,
+                        help='read sales from this month-partitioned store (see ingest.py) instead of --sales_csv')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only recompute leaderboard months whose sales changed since the last run')
+    parser.add_argument('--force', action='store_true',
+                        help='rerun every stage even if its inputs are unchanged')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='process pool size for running independent stages in parallel')
+    parser.add_argument('--segments', action='store_true',
+                        help='also forecast every Region, Dealer_Branch and Vehicle_Model series')
+    parser.add_argument('--segment_workers', type=int, default=None,
+                        help='process pool size for segment forecasts (default: all cores)')
+    parser.add_argument('--forecaster', choices=['auto', *FORECAST_ORDER], default='auto',
+                        help="forecasting model; 'auto' tries Prophet, then ARIMA, then NumPy Holt-Winters")
+    parser.add_argument('--refit', action='store_true',
+                        help='ignore the saved Prophet/ARIMA fits and refit from scratch')
+    parser.add_argument('--drift_threshold', type=float, default=None,
+                        help='relative drift that triggers a full Prophet/ARIMA refit (default 0.10)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream --sales_csv in chunks of this many rows instead of loading it whole')
+    parser.add_argument('--metrics_log', default=str(METRICS_LOG),
+                        help='JSON-lines file that gets one record per stage and one per run')
+    parser.add_argument('--prometheus_textfile', default=None,
+                        help="also write this run's metrics here, e.g. into node_exporter's textfile directory")
+    args = parser.parse_args()
+    if args.chunksize and (args.segments or args.incremental or args.store):
+        parser.error('--chunksize cannot be combined with --segments, --incremental or --store')
+    main(args.sales_csv, incremental=args.incremental, force=args.force, workers=args.workers,
+         segments=args.segments, segment_workers=args.segment_workers, forecaster=args.forecaster,
+         refit=args.refit, drift_threshold=args.drift_threshold, store_dir=args.store,
+         chunksize=args.chunksize, metrics_log=args.metrics_log,
+         prometheus_textfile=args.prometheus_textfile)
@@ -0,0 +1,78 @@
+"""sales_cube.py
+
+Pre-aggregated month x Region x Salesperson x Vehicle_Model cube for the dashboard.
+- Built once per data version from the raw rows. Each cube row carries the sums the
+  dashboard needs: Price, Quantity, Profit and Revenue (sum of Price * Quantity).
+- Cube rows keep a Date column (month-end) so the dashboard's monthly Grouper, model
+  and region groupbys run unchanged on either raw rows or cube rows.
+- A filter is cube-aligned when its date range covers whole months of data; other
+  filters return None and the caller falls back to raw rows.
+- The module exposes:
+    * SalesCube(df)                      -> cube built from raw sale rows
+    * SalesCube.select(start, end, ...)  -> cube rows for a cube-aligned filter, else None
+    * summarize(rows)                    -> KPIs and chart frames from raw or cube rows
+"""
+
+import pandas as pd
+
+from sales_index import FILTER_DIMS, FilterIndex
+
+
+class SalesCube:
+    def __init__(self, df, dims=FILTER_DIMS):
+        month_end = df['Date'].dt.to_period('M').dt.end_time.dt.normalize()
+        cube = (df.assign(Date=month_end, Revenue=df['Price'].astype('int64') * df['Quantity'])
+                  .groupby(['Date', *dims], observed=True)
+                  .agg(Price=('Price', 'sum'), Quantity=('Quantity', 'sum'),
+                       Profit=('Profit', 'sum'), Revenue=('Revenue', 'sum'))
+                  .reset_index())
+        self.min_date = df['Date'].min()
+        self.max_date = df['Date'].max()
+        # Cube rows are indexed like raw rows, so selection is a date slice plus position lists
+        self.index = FilterIndex(cube, dims)
+
+    @property
+    def frame(self):
+        return self.index.frame
+
+    def month_range(self, start, end):
+        """(first, last) month-end covered by [start, end], or None if not month-aligned."""
+        start = max(pd.Timestamp(start), self.min_date)
+        end = min(pd.Timestamp(end), self.max_date)
+        if start > end:
+            return start, start - pd.Timedelta(days=1)   # empty range
+        start_ok = start.day == 1 or start == self.min_date
+        end_ok = end.is_month_end or end == self.max_date
+        if not (start_ok and end_ok):
+            return None
+        return start + pd.offsets.MonthEnd(0), end + pd.offsets.MonthEnd(0)
+
+    def select(self, start, end, filters=None):
+        """Cube rows answering the filter, or None when the date range splits a month."""
+        months = self.month_range(start, end)
+        if months is None:
+            return None
+        return self.index.select(months[0], months[1], filters)
+
+
+def summarize(rows):
+    """Dashboard KPIs and chart-ready frames from raw sale rows or SalesCube rows."""
+    # int64 before multiplying: the schema's int32 Price x int16 Quantity would wrap
+    revenue = rows['Revenue'] if 'Revenue' in rows.columns else rows['Price'].astype('int64') * rows['Quantity']
+    total_revenue = revenue.sum()
+    total_units = rows['Quantity'].sum()
+    monthly = rows.groupby(pd.Grouper(key='Date', freq='M')).agg(
+        Revenue=('Price', 'sum'), Units=('Quantity', 'sum')).reset_index()
+    top_models = (rows.groupby('Vehicle_Model', observed=True)
+                      .agg(Revenue=('Price', 'sum'), Units=('Quantity', 'sum'))
+                      .reset_index().sort_values('Revenue', ascending=False).head(10))
+    sales_region = rows.groupby('Region', observed=True).agg(Revenue=('Price', 'sum')).reset_index()
+    return {
+        'total_revenue': total_revenue,
+        'total_units': total_units,
+        'avg_price': total_revenue / max(1, total_units),
+        'total_profit': rows['Profit'].sum(),
+        'monthly': monthly,
+        'top_models': top_models,
+        'sales_region': sales_region,
+    }
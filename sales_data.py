@@ -0,0 +1,163 @@
+"""sales_data.py
+
+Loading helpers for the Stallion Motors transaction file.
+- The first load of a CSV parses it once (with the sales_schema dtypes) and writes a typed
+  Arrow (Feather v2) copy under .cache/, keyed by the CSV's size, mtime, a content digest
+  and the schema version.
+- Later loads memory-map that Arrow file instead of re-parsing the CSV.
+- If pyarrow is not installed, or the cache cannot be written, loading falls back to
+  pd.read_csv with identical output.
+- Rows are returned Date-sorted (stable), and the Arrow copy is written in that order, so
+  the dashboard's FilterIndex can keep the memory-mapped buffers instead of re-sorting.
+- A shared load (shared=True) maps the Arrow buffers zero-copy and returns a read-only
+  frame, meant to be held once per process and read by every dashboard session.
+- The module exposes:
+    * load_sales(csv_path)        -> transaction DataFrame (cached when possible)
+    * freeze_frame(df)            -> read-only view of df without copying column data
+    * csv_fingerprint(csv_path)   -> cache key for a CSV file
+    * csv_digest(csv_path)        -> digest of the CSV's full content (ignores mtime)
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sales_schema import SCHEMA_VERSION, read_sales_csv
+
+PROJ = Path(__file__).resolve().parent
+CACHE_DIR = PROJ / '.cache'
+
+# Bytes hashed from the start and end of the CSV. Size and mtime catch rewrites;
+# the digest catches in-place edits that preserve both (e.g. copied files).
+_DIGEST_BLOCK = 1 << 20
+# Bumped when the cached file's layout changes (2: rows Date-sorted)
+CACHE_LAYOUT = 2
+
+
+def csv_fingerprint(csv_path):
+    """Return a short hex key built from size, mtime, a head/tail content digest and the schema version."""
+    path = Path(csv_path)
+    st = path.stat()
+    h = hashlib.sha256()
+    h.update(f'{st.st_size}:{st.st_mtime_ns}:{SCHEMA_VERSION}'.encode())
+    with open(path, 'rb') as fh:
+        h.update(fh.read(_DIGEST_BLOCK))
+        if st.st_size > _DIGEST_BLOCK:
+            fh.seek(max(_DIGEST_BLOCK, st.st_size - _DIGEST_BLOCK))
+            h.update(fh.read(_DIGEST_BLOCK))
+    return h.hexdigest()[:16]
+
+
+def csv_digest(csv_path):
+    """Hash of the whole file and the schema version: a touched or byte-identical
+    re-exported file keeps its digest. Digests are remembered per path, size and mtime
+    in .cache/csv_digests.json, so only new or touched files are read in full."""
+    path = Path(csv_path).resolve()
+    st = path.stat()
+    stamp = [st.st_size, st.st_mtime_ns]
+    memo_path = CACHE_DIR / 'csv_digests.json'
+    try:
+        memo = json.loads(memo_path.read_text())
+    except (OSError, ValueError):
+        memo = {}
+    entry = memo.get(str(path))
+    if entry and entry['stamp'] == stamp and entry['schema'] == SCHEMA_VERSION:
+        return entry['digest']
+    h = hashlib.sha256(f'{SCHEMA_VERSION}:'.encode())
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(_DIGEST_BLOCK), b''):
+            h.update(block)
+    digest = h.hexdigest()[:16]
+    memo[str(path)] = {'stamp': stamp, 'schema': SCHEMA_VERSION, 'digest': digest}
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp = memo_path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(memo, indent=1))
+        os.replace(tmp, memo_path)
+    except OSError:
+        pass
+    return digest
+
+
+def _cache_path(csv_path, key):
+    key = hashlib.sha256(f'{key}:{CACHE_LAYOUT}'.encode()).hexdigest()[:16]
+    return CACHE_DIR / f'{Path(csv_path).stem}-{key}.arrow'
+
+
+def _date_sorted(df):
+    dates = df['Date'].to_numpy()
+    if len(dates) and not (dates[1:] >= dates[:-1]).all():
+        df = df.sort_values('Date', kind='stable', ignore_index=True)
+    return df
+
+
+def _write_cache(df, csv_path, target):
+    from pyarrow import feather
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = target.with_suffix('.tmp')
+    # Uncompressed so later reads can memory-map the buffers directly
+    feather.write_feather(df, tmp, compression='uncompressed')
+    os.replace(tmp, target)
+    # Drop caches of older versions of the same CSV
+    for stale in CACHE_DIR.glob(f'{Path(csv_path).stem}-*.arrow'):
+        if stale != target and len(stale.stem) == len(target.stem):
+            stale.unlink(missing_ok=True)
+
+
+def _readonly(values):
+    if isinstance(values, pd.Categorical):
+        codes = values.codes.view()
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=values.dtype)
+    arr = np.asarray(values).view()
+    arr.flags.writeable = False
+    return arr
+
+
+def freeze_frame(df):
+    """Return a frame over the same column buffers with every buffer marked read-only.
+
+    Writes through the result (or through frames sliced from it) raise instead of
+    silently changing data other readers share.
+    """
+    cols = {c: _readonly(df[c].array if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c].to_numpy())
+            for c in df.columns}
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+
+def load_sales(csv_path, use_cache=True, shared=False):
+    """Load the sales CSV (rows Date-sorted), serving it from the Arrow cache when the file is unchanged.
+
+    With shared=True the numeric columns stay backed by the memory-mapped cache file and
+    the returned frame is read-only (see freeze_frame).
+    """
+    if not use_cache:
+        return _date_sorted(read_sales_csv(csv_path))
+    try:
+        from pyarrow import feather
+    except ImportError:
+        df = _date_sorted(read_sales_csv(csv_path))
+        return freeze_frame(df) if shared else df
+
+    target = _cache_path(csv_path, csv_fingerprint(csv_path))
+    if target.exists():
+        try:
+            table = feather.read_table(target, memory_map=True)
+            if shared:
+                # split_blocks keeps each column in its own block so numeric buffers
+                # are handed over zero-copy instead of consolidated into a new 2D array
+                return freeze_frame(table.to_pandas(split_blocks=True))
+            return table.to_pandas()
+        except Exception as e:
+            print('Ignoring unreadable sales cache', target.name, '-', e)
+
+    df = _date_sorted(read_sales_csv(csv_path))
+    try:
+        _write_cache(df, csv_path, target)
+    except Exception as e:
+        print('Could not write sales cache:', e)
+    return freeze_frame(df) if shared else df
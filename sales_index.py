@@ -0,0 +1,93 @@
+"""sales_index.py
+
+Filter index for the dashboard's sidebar filters.
+- The frame is sorted by Date once, so a date range becomes a contiguous row slice found
+  by binary search.
+- For each filter dimension (Region, Salesperson, Vehicle_Model) the index keeps the
+  sorted row positions of every value.
+- Applying a filter combination costs roughly the size of the smallest matching position
+  list, not the size of the dataset.
+- The module exposes:
+    * FilterIndex(df)                       -> index over a Date-sorted, read-only copy of df
+    * FilterIndex.select(start, end, ...)   -> filtered rows
+"""
+
+import numpy as np
+import pandas as pd
+
+from sales_data import freeze_frame
+
+FILTER_DIMS = ('Region', 'Salesperson', 'Vehicle_Model')
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _positions_by_value(values):
+    """Map each observed value to the ascending row positions holding it."""
+    codes, uniques = pd.factorize(values, sort=True)
+    order = np.argsort(codes, kind='stable')   # stable -> positions ascending per value
+    bounds = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))
+    chunks = np.split(order[(codes < 0).sum():], bounds[:-1])
+    return dict(zip(uniques.tolist(), chunks))
+
+
+def _intersect_sorted(lists):
+    """Intersect ascending position arrays, probing the larger ones from the smallest."""
+    lists = sorted(lists, key=len)
+    out = lists[0]
+    for other in lists[1:]:
+        if not len(out) or not len(other):
+            return _EMPTY
+        idx = np.minimum(np.searchsorted(other, out), len(other) - 1)
+        out = out[other[idx] == out]
+    return out
+
+
+class FilterIndex:
+    def __init__(self, df, dims=FILTER_DIMS):
+        dates = df['Date'].to_numpy()
+        if len(dates) and not (dates[1:] >= dates[:-1]).all():
+            df = df.iloc[np.argsort(dates, kind='stable')]
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            df = df.reset_index(drop=True)
+        # An already sorted frame (load_sales output) keeps its buffers, e.g. the mmapped cache
+        self.frame = freeze_frame(df)
+        self.dates = self.frame['Date'].to_numpy()
+        self.positions = {dim: _positions_by_value(self.frame[dim]) for dim in dims}
+
+    @property
+    def min_date(self):
+        return pd.Timestamp(self.dates[0]) if len(self.dates) else None
+
+    @property
+    def max_date(self):
+        return pd.Timestamp(self.dates[-1]) if len(self.dates) else None
+
+    def values(self, dim):
+        """Sorted values of dim that occur in the data."""
+        return list(self.positions[dim])
+
+    def date_bounds(self, start, end):
+        """Row slice [lo, hi) covering start <= Date <= end."""
+        lo = np.searchsorted(self.dates, pd.Timestamp(start).to_datetime64(), side='left')
+        hi = np.searchsorted(self.dates, pd.Timestamp(end).to_datetime64(), side='right')
+        return int(lo), int(hi)
+
+    def row_positions(self, start, end, filters=None):
+        """Row positions matching the date range and {dim: value} filters.
+
+        Returns a slice when no value filter is active, else an ascending position array.
+        """
+        lo, hi = self.date_bounds(start, end)
+        active = {dim: v for dim, v in (filters or {}).items() if v is not None}
+        if not active:
+            return slice(lo, hi)
+        lists = []
+        for dim, value in active.items():
+            pos = self.positions[dim].get(value, _EMPTY)
+            lists.append(pos[np.searchsorted(pos, lo):np.searchsorted(pos, hi)])
+        return _intersect_sorted(lists)
+
+    def select(self, start, end, filters=None):
+        """Rows with start <= Date <= end matching every non-None {dim: value} filter."""
+        return self.frame.iloc[self.row_positions(start, end, filters)]
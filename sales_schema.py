@@ -0,0 +1,68 @@
+"""sales_schema.py
+
+Canonical in-memory schema for Stallion Motors transaction data.
+- Text dimensions are categoricals with fixed, alphabetically ordered dictionaries, so
+  codes are stable between loads and groupbys run on integer codes.
+- Money columns are int32, small counts int16, Date is datetime64[ns].
+- Values missing from a fixed dictionary are appended (sorted) rather than dropped.
+- The module exposes:
+    * read_sales_csv(path, chunksize) -> DataFrame (or iterator of chunks) with the canonical dtypes
+    * apply_schema(df)       -> df converted to the canonical dtypes
+    * CATEGORIES / INT_DTYPES / SCHEMA_VERSION
+"""
+
+import pandas as pd
+
+# Bump when dtypes or dictionaries change; used to invalidate on-disk caches.
+SCHEMA_VERSION = 1
+
+CATEGORIES = {
+    'Vehicle_Model': ['Ford Ranger', 'Honda Civic', 'Hyundai Tucson', 'Isuzu D-Max', 'Kia Sportage',
+                      'Nissan Altima', 'Nissan X-Trail', 'Toyota Camry', 'Toyota Corolla', 'Toyota RAV4'],
+    'Vehicle_Type': ['SUV', 'Sedan', 'Truck'],
+    'Region': ['Abuja', 'Ibadan', 'Kano', 'Lagos', 'Port Harcourt'],
+    'Dealer_Branch': ['Garki Branch', 'Ibadan North', 'Ikeja Branch', 'Kano Central', 'Town Branch',
+                      'Victoria Island Branch', 'Wuse Branch'],
+    'Salesperson': ['Aisha Bello', 'Chinwe Nwosu', 'Emeka Okoye', 'Grace Ibrahim', 'John Smith',
+                    'Lilian Okafor', 'Mariam Yusuf', 'Peter Eze', 'Samuel Ogundele', 'Tunde Adebayo'],
+    'Customer_Gender': ['F', 'M'],
+    'Payment_Method': ['Cash', 'Finance', 'Lease'],
+    'Customer_Type': ['New', 'Returning'],
+}
+
+INT_DTYPES = {
+    'Price': 'int32',
+    'Cost': 'int32',
+    'Profit': 'int32',
+    'Customer_Age': 'int16',
+    'Quantity': 'int16',
+}
+
+
+def _categorical(s, known):
+    cat = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype('category')
+    extra = sorted(set(cat.cat.categories) - set(known))
+    return cat.cat.set_categories(list(known) + extra)
+
+
+def apply_schema(df):
+    """Return df with canonical dtypes (columns not in the schema are left untouched)."""
+    out = df.copy()
+    if 'Date' in out.columns and not pd.api.types.is_datetime64_dtype(out['Date']):
+        out['Date'] = pd.to_datetime(out['Date'])
+    for col, known in CATEGORIES.items():
+        if col in out.columns:
+            out[col] = _categorical(out[col], known)
+    for col, dtype in INT_DTYPES.items():
+        # Columns with gaps keep their float dtype rather than failing the load
+        if col in out.columns and not out[col].isna().any():
+            out[col] = out[col].astype(dtype)
+    return out
+
+
+def read_sales_csv(path, chunksize=None):
+    """pd.read_csv with the canonical schema; with chunksize, an iterator of such frames."""
+    kwargs = {'parse_dates': ['Date'], 'dtype': {c: 'category' for c in CATEGORIES}}
+    if chunksize is not None:
+        return (apply_schema(chunk) for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs))
+    return apply_schema(pd.read_csv(path, **kwargs))
@@ -0,0 +1,177 @@
+"""sales_store.py
+
+Append-only, month-partitioned columnar store for Stallion Motors transactions.
+- Layout: <root>/month=YYYY-MM/part-NNNNN.arrow (Feather v2, uncompressed, canonical
+  sales_schema dtypes) plus <root>/_manifest.json listing the committed parts, row count
+  and Revenue / Units / Profit totals of every partition.
+- append() only ever adds part files. Part files are written first and the manifest is
+  replaced last, so a crashed ingest leaves at most an unreferenced file behind.
+- Monthly totals are additive: append() aggregates only the new rows and adds them to the
+  totals of the partitions they land in.
+- New rows are deduplicated on Sale_ID against the partitions they fall into (a resent
+  daily file adds nothing) and within the delta itself. The first append into an empty
+  store imports its file as-is: the historical export reuses some Sale_IDs for
+  different sales.
+- Reads open only the partitions overlapping the requested date range, memory-mapped.
+- Requires pyarrow.
+- The module exposes:
+    * SalesStore(root)                              -> store handle
+    * SalesStore.read(start, end, columns)          -> transactions from overlapping partitions
+    * SalesStore.append(df)                         -> rows actually added
+    * SalesStore.months() / version(start, end)     -> partition keys / data version key
+    * SalesStore.date_bounds() / values(dims)       -> date range / dimension values, no data read
+    * SalesStore.monthly_agg()                      -> monthly totals maintained on append
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from sales_schema import CATEGORIES, SCHEMA_VERSION, apply_schema
+
+PROJ = Path(__file__).resolve().parent
+STORE_DIR = PROJ / 'sales_store'
+
+
+def month_key(ts):
+    return pd.Timestamp(ts).strftime('%Y-%m')
+
+
+def monthly_totals(df):
+    """Revenue / Units / Profit per 'YYYY-MM' month of df."""
+    return df.groupby(df['Date'].dt.strftime('%Y-%m')).agg(
+        Revenue=('Price', 'sum'), Units=('Quantity', 'sum'), Profit=('Profit', 'sum'))
+
+
+class SalesStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.manifest_path = self.root / '_manifest.json'
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return {'schema_version': SCHEMA_VERSION, 'partitions': {}}
+        if manifest.get('schema_version') != SCHEMA_VERSION:
+            raise ValueError(f'{self.root} was written with schema version {manifest.get("schema_version")}, '
+                             f'expected {SCHEMA_VERSION}; re-ingest it')
+        return manifest
+
+    def _write_manifest(self):
+        tmp = self.manifest_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self._manifest, indent=2, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
+
+    def months(self, start=None, end=None):
+        """Partition keys ('YYYY-MM'), restricted to those overlapping [start, end]."""
+        keys = sorted(self._manifest['partitions'])
+        lo = month_key(start) if start is not None else None
+        hi = month_key(end) if end is not None else None
+        return [k for k in keys if (lo is None or k >= lo) and (hi is None or k <= hi)]
+
+    def rows(self, start=None, end=None):
+        return sum(self._manifest['partitions'][k]['rows'] for k in self.months(start, end))
+
+    def date_bounds(self):
+        """(first, last) sale date in the store, from the manifest."""
+        parts = self._manifest['partitions']
+        keys = sorted(parts)
+        return (pd.Timestamp(parts[keys[0]].get('min_date', keys[0])),
+                pd.Timestamp(parts[keys[-1]].get('max_date', pd.Period(keys[-1]).end_time.normalize())))
+
+    def values(self, dims):
+        """{dim: sorted values occurring in any partition}, from the manifest."""
+        out = {}
+        for dim in dims:
+            seen = set()
+            for entry in self._manifest['partitions'].values():
+                seen.update(entry.get('values', {}).get(dim, []))
+            out[dim] = sorted(seen)
+        return out
+
+    def version(self, start=None, end=None):
+        """Key that changes whenever a partition overlapping [start, end] gains rows."""
+        parts = {k: self._manifest['partitions'][k]['parts'] for k in self.months(start, end)}
+        blob = json.dumps([SCHEMA_VERSION, parts], sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+    def _part_paths(self, key):
+        return [self.root / f'month={key}' / name for name in self._manifest['partitions'][key]['parts']]
+
+    def read(self, start=None, end=None, columns=None):
+        """Transactions from the partitions overlapping [start, end] (whole months; filter
+        rows further if exact day bounds matter). Empty frame when nothing overlaps."""
+        import pyarrow as pa
+        from pyarrow import feather
+        paths = [p for k in self.months(start, end) for p in self._part_paths(k)]
+        if not paths:
+            keys = self.months()
+            if not keys:
+                return pd.DataFrame(columns=columns or [])
+            # Nothing in range: an empty frame that still has the stored columns and dtypes
+            table = feather.read_table(self._part_paths(keys[0])[0], columns=columns, memory_map=True)
+            return apply_schema(table.slice(0, 0).to_pandas())
+        tables = [feather.read_table(p, columns=columns, memory_map=True) for p in paths]
+        # Parts share the canonical dictionaries, so categoricals come back unchanged
+        return apply_schema(pa.concat_tables(tables).to_pandas())
+
+    def _known_ids(self, keys):
+        if not keys:
+            return set()
+        return set(self.read(start=keys[0], end=keys[-1], columns=['Sale_ID'])['Sale_ID'])
+
+    def append(self, df):
+        """Append new transactions; returns the rows that were actually added."""
+        from pyarrow import feather
+        delta = apply_schema(df)
+        if self._manifest['partitions']:
+            delta = delta.drop_duplicates('Sale_ID')
+            months = delta['Date'].dt.strftime('%Y-%m')
+            known = self._known_ids(self.months(months.min(), months.max())) if len(delta) else set()
+            delta = delta[~delta['Sale_ID'].isin(known)]
+        if delta.empty:
+            return delta
+
+        totals = monthly_totals(delta)
+        months = delta['Date'].dt.strftime('%Y-%m')
+        for key, rows in delta.groupby(months, sort=True):
+            entry = self._manifest['partitions'].setdefault(
+                key, {'parts': [], 'rows': 0, 'totals': dict.fromkeys(totals.columns, 0)})
+            name = f'part-{len(entry["parts"]):05d}.arrow'
+            target = self.root / f'month={key}' / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix('.tmp')
+            feather.write_feather(rows.reset_index(drop=True), tmp, compression='uncompressed')
+            os.replace(tmp, target)
+            entry['parts'].append(name)
+            entry['rows'] += len(rows)
+            for col, value in totals.loc[key].items():
+                entry['totals'][col] += int(value)
+            # Day bounds and dimension values let readers size a query without opening parts
+            lo, hi = rows['Date'].min().strftime('%Y-%m-%d'), rows['Date'].max().strftime('%Y-%m-%d')
+            entry['min_date'] = min(entry.get('min_date', lo), lo)
+            entry['max_date'] = max(entry.get('max_date', hi), hi)
+            values = entry.setdefault('values', {})
+            for col in CATEGORIES:
+                if col in rows.columns:
+                    seen = {str(v) for v in rows[col].dropna().unique()}
+                    values[col] = sorted(set(values.get(col, [])) | seen)
+        self._write_manifest()
+        return delta
+
+    def monthly_agg(self):
+        """ds, Revenue, Units, Profit per month from the stored totals, in the
+        stallion_monthly_agg.csv layout (months without sales are kept as zeros)."""
+        columns = ['Revenue', 'Units', 'Profit']
+        parts = self._manifest['partitions']
+        if not parts:
+            return pd.DataFrame(columns=['ds', *columns])
+        totals = pd.DataFrame.from_dict({k: v['totals'] for k, v in parts.items()}, orient='index')
+        totals.index = pd.PeriodIndex(totals.index, freq='M').to_timestamp(how='end').normalize()
+        months = pd.date_range(totals.index.min(), totals.index.max(), freq='M', name='ds')
+        return totals[columns].reindex(months, fill_value=0).astype('int64').reset_index()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""sql_backend.py
+
+Optional embedded SQL backend for dashboard queries and the leaderboard aggregation.
+- Transactions are loaded once per data version into a local database file under
+  .cache/ (DuckDB when installed, otherwise the standard library's SQLite). Queries run
+  inside the engine and only their small results come back to pandas, so the dashboard
+  no longer needs the whole history in memory.
+- SalesDB.summarize answers the same question as sales_cube.summarize (KPIs, monthly
+  series, top models, region share) for a date range and filter dict.
+- SalesDB.leaderboard runs the (Salesperson, Month) aggregation of the sale-level
+  commissions in SQL; the monthly bonuses are then applied by
+  commission_calc._finalize_leaderboard on the aggregated rows.
+- compare_backends checks both backends for identical results (commission sums to the
+  cent: the engines add the per-sale amounts in a different order), including the
+  leaderboard of a scratch copy with a salesperson missing from the schema.
+- The pandas path stays the default: app.py uses this module only with SALES_BACKEND=sql.
+- The module exposes:
+    * SalesDB(path, engine)                      -> database handle
+    * SalesDB.load_csv(csv_path, version)        -> (re)load the sales table if the version changed
+    * SalesDB.summarize(start, end, filters)     -> sales_cube.summarize-style dict
+    * SalesDB.rows(start, end, filters, limit)   -> raw rows, Date-sorted (or searched / sorted / offset)
+    * SalesDB.count(start, end, filters, search) -> number of rows matching
+    * SalesDB.leaderboard(target_month, config)  -> compute_leaderboard-style frame
+    * compare_backends(df, db, config)           -> list of mismatches (empty when identical)
+
+Usage:
+    python sql_backend.py --sales_csv stallion_sales_data.csv    # build the DB and compare backends
+"""
+import argparse
+import importlib.util
+from pathlib import Path
+import threading
+
+import numpy as np
+import pandas as pd
+
+from raw_explorer import SEARCH_COLUMNS
+from sales_schema import CATEGORIES, INT_DTYPES, read_sales_csv
+
+PROJ = Path(__file__).resolve().parent
+CACHE_DIR = PROJ / '.cache'
+TEXT_COLUMNS = ['Sale_ID', 'Date', *CATEGORIES]
+# Rows per INSERT batch when loading SQLite from the CSV
+LOAD_CHUNKSIZE = 200_000
+
+
+def default_engine():
+    return 'duckdb' if importlib.util.find_spec('duckdb') is not None else 'sqlite'
+
+
+class SalesDB:
+    def __init__(self, path=None, engine=None):
+        self.engine = engine or default_engine()
+        self.path = Path(path) if path is not None else CACHE_DIR / f'sales.{self.engine}'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit runs sessions on several threads; they share this connection behind a lock
+        self._lock = threading.Lock()
+        if self.engine == 'duckdb':
+            import duckdb
+            self._conn = duckdb.connect(str(self.path))
+        else:
+            import sqlite3
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+
+    def query(self, sql, params=()):
+        """Run sql and return the result as a DataFrame."""
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute(sql, list(params))
+            columns = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            self._conn.execute(sql, list(params))
+            self._conn.commit()
+
+    def version(self):
+        try:
+            return self.query('SELECT version FROM meta')['version'].iloc[0]
+        except Exception:
+            return None
+
+    def load_csv(self, csv_path, version):
+        """Load csv_path into the sales table unless it already holds `version`."""
+        if self.version() == version:
+            return False
+        self._execute('DROP TABLE IF EXISTS sales')
+        columns = ', '.join([f'{c} VARCHAR' for c in TEXT_COLUMNS] + [f'{c} BIGINT' for c in INT_DTYPES])
+        self._execute(f'CREATE TABLE sales ({columns})')
+        names = [*TEXT_COLUMNS, *INT_DTYPES]
+        if self.engine == 'duckdb':
+            # DuckDB reads the file itself; nothing passes through pandas
+            casts = ', '.join([f'CAST({c} AS VARCHAR)' for c in TEXT_COLUMNS[:1]]
+                              + [f"strftime(CAST(Date AS DATE), '%Y-%m-%d')"]
+                              + [f'CAST({c} AS VARCHAR)' for c in CATEGORIES]
+                              + [f'CAST({c} AS BIGINT)' for c in INT_DTYPES])
+            self._execute(f'INSERT INTO sales SELECT {casts} FROM read_csv_auto(?, header=true)', [str(csv_path)])
+        else:
+            insert = f'INSERT INTO sales ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})'
+            for chunk in pd.read_csv(csv_path, chunksize=LOAD_CHUNKSIZE, dtype={c: str for c in TEXT_COLUMNS}):
+                chunk['Date'] = pd.to_datetime(chunk['Date']).dt.strftime('%Y-%m-%d')
+                rows = chunk[names].astype(object).where(chunk[names].notna(), None)
+                with self._lock:
+                    self._conn.executemany(insert, rows.itertuples(index=False, name=None))
+            self._execute('CREATE INDEX IF NOT EXISTS sales_date ON sales (Date)')
+        self._execute('DROP TABLE IF EXISTS meta')
+        self._execute('CREATE TABLE meta (version VARCHAR)')
+        self._execute('INSERT INTO meta VALUES (?)', [version])
+        return True
+
+    def date_bounds(self):
+        bounds = self.query('SELECT MIN(Date) AS lo, MAX(Date) AS hi FROM sales')
+        return pd.Timestamp(bounds['lo'].iloc[0]), pd.Timestamp(bounds['hi'].iloc[0])
+
+    def values(self, dims):
+        return {dim: self.query(f'SELECT DISTINCT {dim} AS v FROM sales WHERE {dim} IS NOT NULL ORDER BY v')['v'].tolist()
+                for dim in dims}
+
+    @staticmethod
+    def _where(start, end, filters):
+        clauses = ['Date >= ?', 'Date <= ?']
+        params = [pd.Timestamp(start).strftime('%Y-%m-%d'), pd.Timestamp(end).strftime('%Y-%m-%d')]
+        for dim, value in (filters or {}).items():
+            if value is not None:
+                clauses.append(f'{dim} = ?')
+                params.append(value)
+        return ' AND '.join(clauses), params
+
+    @staticmethod
+    def _search(where, params, search):
+        """Add a case-insensitive substring match on SEARCH_COLUMNS (LIKE wildcards are literal)."""
+        if not search:
+            return where, params
+        pattern = '%' + search.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        match = ' OR '.join(f"lower({col}) LIKE ? ESCAPE '\\'" for col in SEARCH_COLUMNS)
+        return f'{where} AND ({match})', params + [pattern] * len(SEARCH_COLUMNS)
+
+    def count(self, start, end, filters=None, search=None):
+        where, params = self._search(*self._where(start, end, filters), search)
+        return int(self.query(f'SELECT COUNT(*) AS n FROM sales WHERE {where}', params)['n'].iloc[0])
+
+    def rows(self, start, end, filters=None, limit=None, search=None, sort=None, descending=False, offset=0):
+        """Raw rows matching the filter, Date-sorted (ties in load order), with Year/Month.
+        search / sort / descending / offset page through them like raw_explorer.row_order;
+        ties in the sort column stay Date-sorted."""
+        where, params = self._search(*self._where(start, end, filters), search)
+        order = 'Date, rowid'
+        if sort is not None:
+            if sort not in self.query('SELECT * FROM sales LIMIT 0').columns:
+                raise ValueError(f'unknown sort column: {sort}')
+            order = f'{sort} {"DESC" if descending else "ASC"}, {order}'
+        sql = f'SELECT * FROM sales WHERE {where} ORDER BY {order}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)} OFFSET {int(offset)}'
+        df = self.query(sql, params)
+        df['Date'] = pd.to_datetime(df['Date'])
+        df['Year'] = df['Date'].dt.year
+        df['Month'] = df['Date'].dt.month
+        return df
+
+    def summarize(self, start, end, filters=None):
+        """KPIs and chart frames for the filter, in the sales_cube.summarize format."""
+        where, params = self._where(start, end, filters)
+        totals = self.query(f'SELECT COALESCE(SUM(Price * Quantity), 0) AS revenue, COALESCE(SUM(Quantity), 0) AS units, '
+                            f'COALESCE(SUM(Profit), 0) AS profit FROM sales WHERE {where}', params)
+        total_revenue, total_units, total_profit = (np.int64(totals[c].iloc[0]) for c in ('revenue', 'units', 'profit'))
+
+        monthly = self.query(f'SELECT substr(Date, 1, 7) AS month, SUM(Price) AS Revenue, SUM(Quantity) AS Units '
+                             f'FROM sales WHERE {where} GROUP BY month ORDER BY month', params)
+        monthly.index = pd.PeriodIndex(monthly.pop('month'), freq='M').to_timestamp(how='end').normalize()
+        if len(monthly):
+            # Months without sales inside the range show as zeros, like pd.Grouper
+            monthly = monthly.reindex(pd.date_range(monthly.index.min(), monthly.index.max(), freq='M'),
+                                      fill_value=0)
+        monthly = monthly.astype('int64').rename_axis('Date').reset_index()
+
+        top_models = self.query(f'SELECT Vehicle_Model, SUM(Price) AS Revenue, SUM(Quantity) AS Units FROM sales '
+                                f'WHERE {where} GROUP BY Vehicle_Model ORDER BY Revenue DESC, Vehicle_Model LIMIT 10',
+                                params)
+        sales_region = self.query(f'SELECT Region, SUM(Price) AS Revenue FROM sales WHERE {where} '
+                                  f'GROUP BY Region ORDER BY Region', params)
+        return {
+            'total_revenue': total_revenue,
+            'total_units': total_units,
+            'avg_price': total_revenue / max(1, total_units),
+            'total_profit': total_profit,
+            'monthly': monthly,
+            'top_models': top_models.astype({'Revenue': 'int64', 'Units': 'int64'}),
+            'sales_region': sales_region.astype({'Revenue': 'int64'}),
+        }
+
+    def sale_level_partials(self, cfg):
+        """commission_calc._sale_level_partials computed by the SQL engine.
+
+        Per-sale amounts are rounded like compute_sale_commissions (Python's round, which
+        SQL ROUND does not match on half cents): each distinct base value, and each
+        model's spiff, is rounded in Python into a small lookup the query joins against.
+        """
+        from commission_calc import _round2
+        price_rate = cfg.get('base_commission_rate_on_price')
+        rate_col = 'Price' if price_rate else 'Profit'
+        rate = price_rate or cfg['base_commission_rate_on_profit']
+        values = self.query(f'SELECT DISTINCT {rate_col} AS v FROM sales WHERE {rate_col} IS NOT NULL')['v']
+        base = pd.DataFrame({'v': values.astype('int64'),
+                             'amount': _round2(rate * values.to_numpy(dtype=float))})
+        self._execute('DROP TABLE IF EXISTS base_amounts')
+        self._execute('CREATE TEMPORARY TABLE base_amounts (v BIGINT, amount DOUBLE)')
+        with self._lock:
+            self._conn.executemany('INSERT INTO base_amounts VALUES (?, ?)',
+                                   list(base.astype(object).itertuples(index=False, name=None)))
+
+        spiffs = cfg.get('model_spiffs', {})
+        flat = cfg.get('per_sale_flat_spiff', 0.0)
+        models = [m for m in spiffs if m is not None]
+        model_amounts = _round2([spiffs[m] + flat for m in models]) if models else []
+        other, missing = _round2([0.0 + flat, spiffs.get(None, 0.0) + flat])
+        cases = ' '.join('WHEN s.Vehicle_Model = ? THEN ?' for _ in models)
+        case_params = [v for m, a in zip(models, model_amounts) for v in (m, float(a))]
+        sql = f'''
+            SELECT s.Salesperson, substr(s.Date, 1, 7) AS Month,
+                   SUM(s.Price) AS Revenue, SUM(s.Quantity) AS Units, SUM(s.Profit) AS Profit,
+                   SUM(COALESCE(b.amount, 0.0)) AS Sale_Base_Com,
+                   SUM(CASE WHEN s.Vehicle_Model IS NULL THEN ? {cases} ELSE ? END) AS Sale_Spiffs,
+                   SUM(CASE WHEN s.Customer_Type = 'Returning' THEN ? ELSE 0.0 END) AS Sale_ReturningBonuses
+            FROM sales s LEFT JOIN base_amounts b ON s.{rate_col} = b.v
+            GROUP BY s.Salesperson, Month ORDER BY s.Salesperson, Month'''
+        params = [float(missing), *case_params, float(other),
+                  float(_round2([cfg.get('returning_customer_bonus', 0.0)])[0])]
+        agg = self.query(sql, params)
+        # The dictionary read_sales_csv gives the same data: the schema's values, then extras sorted
+        known = CATEGORIES['Salesperson']
+        extra = sorted(set(agg['Salesperson'].dropna()) - set(known))
+        agg['Salesperson'] = agg['Salesperson'].astype(pd.CategoricalDtype(known + extra))
+        agg['Month'] = pd.PeriodIndex(agg['Month'], freq='M')
+        agg = agg.sort_values(['Salesperson', 'Month']).reset_index(drop=True)
+        return agg.astype({'Revenue': 'int64', 'Units': 'int64', 'Profit': 'int64',
+                           'Sale_Base_Com': float, 'Sale_Spiffs': float, 'Sale_ReturningBonuses': float})
+
+    def leaderboard(self, target_month=None, config=None):
+        """compute_leaderboard with the per-sale aggregation done in SQL."""
+        from commission_calc import DEFAULT_CONFIG, _finalize_leaderboard
+        cfg = DEFAULT_CONFIG if config is None else config
+        return _finalize_leaderboard(self.sale_level_partials(cfg), cfg, target_month)
+
+
+# Not in the schema's Salesperson values, and sorting before them
+EXTRA_SALESPERSON = 'Abe Newhire'
+
+COMPARE_CASES = [
+    (None, None, {}),
+    ('2023-03-01', '2024-06-30', {'Vehicle_Model': 'Honda Civic'}),
+    ('2023-03-15', '2023-08-02', {'Region': 'Abuja'}),
+    (None, None, {'Region': 'Kano', 'Salesperson': 'John Smith', 'Vehicle_Model': 'Toyota RAV4'}),
+]
+
+
+def _same(a, b, cents=False):
+    if isinstance(a, pd.DataFrame):
+        if list(a.columns) != list(b.columns) or len(a) != len(b):
+            return False
+        return all(_same(a[c].to_numpy(), b[c].to_numpy(), cents) for c in a.columns)
+    a, b = np.asarray(a), np.asarray(b)
+    if cents and a.dtype.kind == 'f':
+        return np.array_equal(np.round(a, 2), np.round(b.astype(float), 2))
+    return np.array_equal(a.astype(str) if a.dtype == object else a, b.astype(str) if b.dtype == object else b)
+
+
+def compare_backends(df, db, config=None, cases=COMPARE_CASES):
+    """Compare pandas and SQL results for the dashboard summaries and the leaderboard.
+    Returns a list of mismatch descriptions (empty when the backends agree)."""
+    from commission_calc import compute_leaderboard
+    from sales_index import FilterIndex
+    from sales_cube import summarize
+    index = FilterIndex(df)
+    problems = []
+    for start, end, filters in cases:
+        start = index.min_date if start is None else pd.Timestamp(start)
+        end = index.max_date if end is None else pd.Timestamp(end)
+        expected = summarize(index.select(start, end, filters))
+        got = db.summarize(start, end, filters)
+        for key, value in expected.items():
+            if not _same(value.reset_index(drop=True) if isinstance(value, pd.DataFrame) else value, got[key]):
+                problems.append(f'summarize {start.date()}..{end.date()} {filters}: {key} differs')
+    expected = compute_leaderboard(df, config=config, use_cache=False).reset_index(drop=True)
+    got = db.leaderboard(config=config).reset_index(drop=True)
+    if not _same(expected, got, cents=True):
+        problems.append('leaderboard differs')
+    if not _extra_salesperson_agrees(df, db.engine, config):
+        problems.append(f'leaderboard differs with a salesperson outside the schema ({EXTRA_SALESPERSON})')
+    return problems
+
+
+def _extra_salesperson_agrees(df, engine, config=None):
+    """Leaderboards of both backends on df plus one sale by EXTRA_SALESPERSON, in a scratch DB."""
+    import tempfile
+    from commission_calc import compute_leaderboard
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'sales.csv'
+        extra = df.tail(1).assign(Sale_ID='S-COMPARE-0001', Salesperson=EXTRA_SALESPERSON)
+        pd.concat([df, extra]).to_csv(csv_path, index=False, date_format='%Y-%m-%d')
+        db = SalesDB(Path(tmp) / f'sales.{engine}', engine)
+        try:
+            db.load_csv(csv_path, 'compare')
+            got = db.leaderboard(config=config).reset_index(drop=True)
+        finally:
+            db.close()
+        expected = compute_leaderboard(read_sales_csv(csv_path), config=config, use_cache=False)
+        return _same(expected.reset_index(drop=True), got, cents=True)
+
+
+def main(sales_csv, engine=None):
+    from sales_data import csv_fingerprint
+    db = SalesDB(engine=engine)
+    loaded = db.load_csv(sales_csv, csv_fingerprint(sales_csv))
+    print(f'{"Loaded" if loaded else "Reusing"} {db.path.name} ({db.engine})')
+    problems = compare_backends(read_sales_csv(sales_csv), db)
+    for p in problems:
+        print('MISMATCH:', p)
+    print('pandas and SQL backends agree' if not problems else f'{len(problems)} mismatches')
+    return not problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sales_csv', default=str(PROJ / 'stallion_sales_data.csv'))
+    parser.add_argument('--engine', choices=['duckdb', 'sqlite'], default=None,
+                        help='SQL engine (default: DuckDB if installed, else SQLite)')
+    args = parser.parse_args()
+    raise SystemExit(0 if main(args.sales_csv, args.engine) else 1)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from commission_calc import (DEFAULT_CONFIG, _apply_tier_bonus, _monthly_bonuses, compute_leaderboard,
+                             compute_leaderboard_incremental, compute_sale_commission, compute_sale_commissions)
+from run_pipeline import PROJ
+from sales_schema import read_sales_csv
+
+
+def test_incremental_leaderboard_with_new_salesperson(tmp_path):
+    raw = pd.read_csv(PROJ / 'stallion_sales_data.csv')
+    state = tmp_path / 'leaderboard_state.pkl'
+    compute_leaderboard_incremental(read_sales_csv(PROJ / 'stallion_sales_data.csv'), state)
+
+    row = raw.iloc[[-1]].assign(Sale_ID='S-NEW-1', Salesperson='Abe Newhire')
+    path = tmp_path / 'sales.csv'
+    pd.concat([raw, row]).to_csv(path, index=False)
+    df = read_sales_csv(path)
+
+    pd.testing.assert_frame_equal(compute_leaderboard_incremental(df, state), compute_leaderboard(df))
+
+
+def _generated_sales(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    price = rng.integers(1_000, 200_000, n)
+    profit = rng.integers(-5_000, 40_000, n)
+    # Odd amounts that land exactly on half cents under the rates below
+    profit[:500] = rng.integers(0, 10_000, 500) * 2 + 1
+    price[:500] = rng.integers(0, 10_000, 500) * 8 + 4
+    return pd.DataFrame({
+        'Price': price, 'Profit': profit,
+        'Vehicle_Model': rng.choice(['Toyota RAV4', 'Honda Civic', 'Ford Ranger', 'Kia Rio'], n),
+        'Customer_Type': rng.choice(['New', 'Returning'], n),
+    })
+
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'base_commission_rate_on_profit': 0.005},
+    {'base_commission_rate_on_profit': 0.0125, 'returning_customer_bonus': 75.125},
+    {'base_commission_rate_on_price': 0.00125},
+    {'base_commission_rate_on_price': 0.0125, 'per_sale_flat_spiff': 0.005,
+     'model_spiffs': {'Toyota RAV4': 200.0, 'Honda Civic': 12.345}},
+])
+def test_sale_commissions_match_per_row(overrides):
+    cfg = {**DEFAULT_CONFIG, **overrides}
+    df = _generated_sales()
+    expected = pd.DataFrame([compute_sale_commission(row, cfg) for _, row in df.iterrows()], index=df.index)
+    pd.testing.assert_frame_equal(compute_sale_commissions(df, cfg), expected, check_exact=True)
+
+
+@pytest.mark.parametrize('tiers', [
+    DEFAULT_CONFIG['tier_bonuses'],
+    [(50000.0, 0.006), (100000.0, 0.012), (150000.0, 0.02), (200000.0, 0.025)],   # ascending
+    [(100000.0, 0.012), (200000.0, 0.025), (50000.0, 0.006), (150000.0, 0.02)],   # unsorted
+    [(100000.0, 0.01), (100000.0, 0.03), (50000.0, 0.005), (150000.0, 0.02)],     # duplicate threshold
+    [(0.0, 0.001), (120000.0, 0.015), (60000.0, 0.0075)],                         # catch-all first
+    [],
+])
+def test_monthly_bonuses_match_per_row(tiers):
+    cfg = {**DEFAULT_CONFIG, 'tier_bonuses': tiers}
+    rng = np.random.default_rng(1)
+    thresholds = [t for t, _ in tiers]
+    # Random revenues plus every threshold and its neighbours
+    revenue = np.concatenate([rng.integers(-1_000, 300_000, 2000).astype(float),
+                              thresholds, np.add(thresholds, 1.0), np.subtract(thresholds, 1.0)])
+    units = rng.integers(0, 16, len(revenue))
+
+    got = _monthly_bonuses(revenue, units, cfg)
+
+    quota, rate = cfg['monthly_quota_revenue'], cfg['quota_accelerator_rate']
+    target = cfg['unit_target_bonus']
+    # Python scalars, as Series.apply passed them: round() on np.float64 rounds differently
+    expected = {
+        'Tier_Bonus': [round(_apply_tier_bonus(r, cfg), 2) for r in revenue.tolist()],
+        'Quota_Accelerator': [round((r - quota) * rate, 2) if r > quota else 0.0 for r in revenue.tolist()],
+        'Unit_Target_Bonus': [target['units_target_bonus_amount'] if u >= target['units_target'] else 0.0
+                              for u in units.tolist()],
+    }
+    for col, values in expected.items():
+        np.testing.assert_array_equal(got[col], np.array(values, dtype=float), err_msg=col)
+
+
+def test_sale_level_partials_persist_across_processes(tmp_path, monkeypatch):
+    import commission_calc
+    df = read_sales_csv(PROJ / 'stallion_sales_data.csv')
+    compute_leaderboard(df, version='v1', cache_dir=tmp_path)
+    assert len(list(tmp_path.glob('sale_level-*.pkl'))) == 1
+
+    # A new process: empty memo, and a tier change must not rerun the sale-level stage
+    commission_calc.clear_sale_level_cache()
+    monkeypatch.setattr(commission_calc, '_sale_level_partials', lambda *a: pytest.fail('recomputed'))
+    cfg = {**DEFAULT_CONFIG, 'tier_bonuses': [(120000.0, 0.03)]}
+    got = compute_leaderboard(df, config=cfg, version='v1', cache_dir=tmp_path)
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(got, compute_leaderboard(df, config=cfg, use_cache=False))
@@ -0,0 +1,32 @@
+import numpy as np
+
+from commission_calc import DEFAULT_CONFIG, compute_leaderboard
+from commission_sweep import sweep_plans
+from run_pipeline import PROJ
+from sales_schema import read_sales_csv
+
+PLANS = [
+    {},
+    {'base_commission_rate_on_profit': 0.005},
+    {'base_commission_rate_on_profit': 0.0625, 'tier_bonuses': [(100000.0, 0.01), (60000.0, 0.005)]},
+    {'base_commission_rate_on_price': 0.0125},
+    {'base_commission_rate_on_price': 0.0125, 'model_spiffs': {'Toyota RAV4': 12.345}},
+    {'returning_customer_bonus': 80.125, 'per_sale_flat_spiff': 0.005, 'monthly_quota_revenue': 60000.0},
+]
+
+
+def test_sweep_matches_leaderboard():
+    df = read_sales_csv(PROJ / 'stallion_sales_data.csv')
+    got = sweep_plans(df, PLANS)
+    for i, plan in enumerate(PLANS):
+        lb = compute_leaderboard(df, config={**DEFAULT_CONFIG, **plan}, use_cache=False)
+        expected = lb.groupby('Salesperson', observed=True)['Total_Commission'].sum()
+        # Per salesperson-month totals are exact; the per-salesperson sums differ in summation order
+        np.testing.assert_allclose(got.iloc[i][expected.index.astype(str)], expected, rtol=0, atol=1e-6)
+
+
+def test_sweep_process_pool_matches_in_process(monkeypatch):
+    import commission_sweep
+    monkeypatch.setattr(commission_sweep, 'BATCH_SIZE', 2)
+    df = read_sales_csv(PROJ / 'stallion_sales_data.csv')
+    assert sweep_plans(df, PLANS, processes=2).equals(sweep_plans(df, PLANS))
@@ -0,0 +1,41 @@
+import json
+import os
+
+from pipeline_dag import Stage, run_stages
+
+
+def _write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:   # e.g. a filesystem with 2 s timestamps
+        os.utime(path, (mtime, mtime))
+    return text
+
+
+def test_output_with_coarse_mtime_is_recorded(tmp_path):
+    out = tmp_path / 'out.csv'
+    _write(out, 'old', mtime=1_000_000_000)
+    stage = Stage('a', lambda inputs: _write(out, 'newer', mtime=1_000_000_000), outputs=[out])
+    manifest = tmp_path / 'manifest.json'
+    assert run_stages([stage], manifest) == {'a': 'ran'}
+    assert list(json.loads(manifest.read_text())['a']['outputs']) == [str(out)]
+
+
+def test_stale_output_is_not_recorded(tmp_path):
+    out = tmp_path / 'out.csv'
+    _write(out, 'from an older run')
+    manifest = tmp_path / 'manifest.json'
+    assert run_stages([Stage('a', lambda inputs: None, outputs=[out])], manifest) == {'a': 'ran'}
+    assert json.loads(manifest.read_text())['a']['outputs'] == {}
+
+
+def test_downstream_skipped_when_upstream_reproduces_its_outputs(tmp_path):
+    up, down = tmp_path / 'up.csv', tmp_path / 'down.csv'
+    manifest = tmp_path / 'manifest.json'
+
+    def stages(source_key):
+        return [Stage('load', lambda inputs: source_key, source_key=source_key),
+                Stage('up', lambda inputs: _write(up, 'same'), deps=('load',), outputs=[up]),
+                Stage('down', lambda inputs: _write(down, 'x'), deps=('up',), outputs=[down])]
+
+    assert run_stages(stages('v1'), manifest) == {'load': 'ran', 'up': 'ran', 'down': 'ran'}
+    assert run_stages(stages('v2'), manifest) == {'load': 'ran', 'up': 'ran', 'down': 'skipped'}
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from sales_cube import SalesCube, summarize
+from sales_schema import apply_schema
+
+
+def test_summarize_raw_rows_do_not_wrap_int32():
+    rows = apply_schema(pd.DataFrame({
+        'Sale_ID': ['S1', 'S2'], 'Date': pd.to_datetime(['2024-01-05', '2024-01-20']),
+        'Vehicle_Model': ['Toyota RAV4'] * 2, 'Vehicle_Type': ['SUV'] * 2,
+        'Price': [2_000_000_000, 1_500_000_000], 'Cost': [0, 0], 'Profit': [0, 0],
+        'Region': ['Lagos'] * 2, 'Dealer_Branch': ['Ikeja Branch'] * 2, 'Salesperson': ['Aisha Bello'] * 2,
+        'Customer_Age': [30, 40], 'Customer_Gender': ['F', 'M'], 'Payment_Method': ['Cash'] * 2,
+        'Customer_Type': ['New'] * 2, 'Quantity': [2, 3]}))
+    assert rows['Price'].dtype == 'int32'
+
+    expected = 2_000_000_000 * 2 + 1_500_000_000 * 3
+    assert summarize(rows)['total_revenue'] == expected
+    assert summarize(SalesCube(rows).frame)['total_revenue'] == expected
@@ -0,0 +1,18 @@
+from commission_calc import DEFAULT_CONFIG
+from run_pipeline import PROJ
+from sales_schema import read_sales_csv
+from sql_backend import SalesDB, compare_backends
+
+
+def test_sqlite_backend_matches_pandas(tmp_path):
+    csv_path = PROJ / 'stallion_sales_data.csv'
+    db = SalesDB(tmp_path / 'sales.sqlite', 'sqlite')
+    try:
+        db.load_csv(csv_path, 'test')
+        df = read_sales_csv(csv_path)
+        assert compare_backends(df, db) == []
+        # A config without the price-rate key falls back to the profit rate, as per row
+        cfg = {k: v for k, v in DEFAULT_CONFIG.items() if k != 'base_commission_rate_on_price'}
+        assert compare_backends(df, db, config=cfg, cases=[]) == []
+    finally:
+        db.close()